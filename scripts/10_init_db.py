@@ -1,5 +1,8 @@
 # scripts/10_init_db.py
-from scripts._db import connect
+import sqlite3
+
+from scripts._db import connect, move_bodies
+from scripts._fts import refresh_fts
 
 DDL = """
 CREATE TABLE IF NOT EXISTS pm_terms (
@@ -17,16 +20,56 @@ CREATE TABLE IF NOT EXISTS speeches (
     dt          TEXT NOT NULL,
     title       TEXT,
     context     TEXT,
-    raw_text    TEXT,
+    raw_text    TEXT,        -- 投入直後だけ本文を持つ。move_bodies が speech_bodies へ移して NULL にする
     source_url  TEXT,
+    char_count  INTEGER,     -- 本文の文字数（本文を読まずに量を出す）
     FOREIGN KEY (pm_term_id) REFERENCES pm_terms(pm_term_id)
 );
 
+-- speech 本文（圧縮 blob）。一覧系のクエリが本文のページを読まないよう speeches から分ける
+CREATE TABLE IF NOT EXISTS speech_bodies (
+    speech_id  INTEGER PRIMARY KEY,
+    codec      TEXT NOT NULL,   -- zlib / zstd（scripts/_db.py の encode_body）
+    text_hash  TEXT NOT NULL,   -- 本文の sha1（30_build_chunks が本文を展開せずに差分判定する）
+    body       BLOB NOT NULL,
+    FOREIGN KEY (speech_id) REFERENCES speeches(id)
+);
+
+-- 全文検索の索引（speech_fts / speech_bigrams）を組み直す speech。トリガが積み、scripts/_fts.py の refresh_fts が消化する。
+-- 索引は本文を持たない（contentless）ので、索引から抜くには索引したときの値が要る。
+-- indexed = 1 の行は、その値（本文は raw_text か、圧縮したままの codec / body）を変更の直前に写しておいたもの
+CREATE TABLE IF NOT EXISTS speech_fts_pending (
+    speech_id  INTEGER PRIMARY KEY,
+    indexed    INTEGER NOT NULL,   -- 0 = まだ索引に無い（新しい speech）
+    title      TEXT,
+    context    TEXT,
+    raw_text   TEXT,
+    codec      TEXT,
+    body       BLOB
+);
+
+-- 本文込みの speech（speech_body() は _db.connect が登録する SQL 関数）
+CREATE VIEW IF NOT EXISTS speech_texts AS
+SELECT s.id, s.title, s.context, COALESCE(s.raw_text, speech_body(b.codec, b.body)) AS raw_text
+FROM speeches s
+LEFT JOIN speech_bodies b ON b.speech_id = s.id;
+
 CREATE TABLE IF NOT EXISTS chunks (
     id              INTEGER PRIMARY KEY AUTOINCREMENT,
     speech_id       INTEGER NOT NULL,
     text            TEXT NOT NULL,
     order_in_speech INTEGER NOT NULL,
+    char_start      INTEGER,     -- speeches.raw_text 上の位置 [char_start, char_end)
+    char_end        INTEGER,     -- text が '' の行は、この範囲を raw_text から切り出して読む
+    FOREIGN KEY (speech_id) REFERENCES speeches(id)
+);
+
+-- speech ごとの最終チャンク化条件（30_build_chunks の差分判定用）
+CREATE TABLE IF NOT EXISTS chunk_builds (
+    speech_id  INTEGER PRIMARY KEY,
+    text_hash  TEXT NOT NULL,
+    params     TEXT NOT NULL,
+    built_at   TEXT DEFAULT (datetime('now','localtime')),
     FOREIGN KEY (speech_id) REFERENCES speeches(id)
 );
 
@@ -38,13 +81,239 @@ CREATE TABLE IF NOT EXISTS chunk_metrics (
     depth_level  INTEGER NOT NULL,
     origin_phase REAL NOT NULL,
     created_at   TEXT DEFAULT (datetime('now','localtime')),
+    rules_version TEXT,
     FOREIGN KEY (chunk_id) REFERENCES chunks(id)
 );
+
+-- 線ビュー用の speech 単位の集約（40_build_metrics が触った speech だけ更新する）
+CREATE TABLE IF NOT EXISTS speech_summary (
+    speech_id        INTEGER PRIMARY KEY,
+    pm_term_id       TEXT,
+    pm_name          TEXT,
+    dt               TEXT,
+    volume_chars     INTEGER NOT NULL,  -- raw_text の文字数
+    n_chunks         INTEGER NOT NULL,
+    depth_max        INTEGER,
+    origin_phase_avg REAL,
+    category_mode    TEXT NOT NULL,     -- 最頻カテゴリ（同率は ' / ' で併記、名前順）
+    FOREIGN KEY (speech_id) REFERENCES speeches(id)
+);
+
+-- dashboard.py 用の件数キューブ（任期 × 月 × カテゴリ × 深さ）。40_build_metrics が触った (任期, 月) だけ数え直す
+CREATE TABLE IF NOT EXISTS metrics_cube (
+    pm_term_id   TEXT NOT NULL,
+    month        TEXT NOT NULL,     -- 'YYYY-MM'（chunk_metrics.date の先頭 7 文字）
+    category     TEXT NOT NULL,
+    depth_level  INTEGER NOT NULL,
+    n_chunks     INTEGER NOT NULL,
+    PRIMARY KEY (pm_term_id, month, category, depth_level)
+);
+
+-- DB 全体の付帯情報（generation = ビルドごとに進む世代。scripts/_db.py の bump_generation）
+CREATE TABLE IF NOT EXISTS meta (
+    key    TEXT PRIMARY KEY,
+    value  TEXT NOT NULL
+);
 """
 
+# 既存DBに後から足した列: (table, column, 型宣言)
+ADD_COLUMNS = [
+    ("chunk_metrics", "rules_version", "TEXT"),
+    ("chunks", "char_start", "INTEGER"),
+    ("chunks", "char_end", "INTEGER"),
+    ("speeches", "char_count", "INTEGER"),
+]
+
+# 既存DBにもそのまま当てられるよう、すべて IF NOT EXISTS で冪等にする
+MIGRATIONS = [
+    # 線ビュー / 一覧: pm_name 絞り込み + dt 範囲・並び
+    "CREATE INDEX IF NOT EXISTS idx_speeches_dt ON speeches(dt)",
+    "CREATE INDEX IF NOT EXISTS idx_speeches_pm_name_dt ON speeches(pm_name, dt)",
+    # スクレイパーの既存チェック（NULL は重複可）
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_speeches_source_url ON speeches(source_url)",
+    # chunks -> speeches の JOIN と、speech 内の並び（id は rowid なので索引に含まれる）
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_chunks_speech_order ON chunks(speech_id, order_in_speech)",
+    # カテゴリ別・日付別の集計
+    "CREATE INDEX IF NOT EXISTS idx_chunk_metrics_category_date ON chunk_metrics(category, date, depth_level)",
+    "CREATE INDEX IF NOT EXISTS idx_chunk_metrics_date ON chunk_metrics(date)",
+    # 40_build_metrics の origin_phase 再計算（任期 × 日付ごとに UPDATE）
+    "CREATE INDEX IF NOT EXISTS idx_chunk_metrics_term_date ON chunk_metrics(pm_term_id, date)",
+    # 線ビュー: speech_summary を dt 範囲で読む（pm_name 絞り込みあり/なし）
+    "CREATE INDEX IF NOT EXISTS idx_speech_summary_dt ON speech_summary(dt)",
+    "CREATE INDEX IF NOT EXISTS idx_speech_summary_pm_name_dt ON speech_summary(pm_name, dt)",
+]
+
+
+# speeches の全文検索（日本語は分かち書きせず trigram で引く）。
+# 本文は speech_bodies に圧縮してあるので、索引は平文を持たない contentless 表にする（DB に本文の写しを置かない）。
+# 索引の更新は Python 側（scripts/_fts.py の refresh_fts）で行い、トリガは speech_fts_pending に
+# 「索引から抜くときに要る、索引したときの値」を写すだけにする。トリガは素の SQL だけなので
+# （speech_body() を呼ばない）、sqlite3 CLI や DB ブラウザなど _db.connect 以外の接続からでも
+# speeches / speech_bodies を INSERT / UPDATE / DELETE できる（索引は次の refresh_fts で追いつく）。
+# 並べ替えは dt 順で bm25 を使わないので、列ごとの長さ（columnsize）も持たない
+FTS_DDL = """
+CREATE VIRTUAL TABLE speech_fts USING fts5(
+    title, context, raw_text,
+    content='',
+    columnsize=0,
+    tokenize='trigram'
+)
+"""
+
+# trigram は 3 文字未満の語を引けないので、2 文字以下の語（景気・物価・憲法…）は bigram の表で引く。
+# 1 行 = 1 speech、grams は title / context / 本文に現れる 2 文字の並び（と語の末尾の 1 文字）を
+# 空白区切りにしたもの（scripts/_fts.py の bigram_text）。位置は要らないので detail=none
+BIGRAM_DDL = """
+CREATE VIRTUAL TABLE speech_bigrams USING fts5(
+    grams,
+    content='',
+    columnsize=0,
+    detail=none,
+    tokenize='unicode61 remove_diacritics 0',
+    prefix='1'
+)
+"""
+
+# 変わる直前の speech の値（= 索引に入っている値）を speech_fts_pending に写す。
+# 既に行がある（前回の refresh_fts 以降に変わった）speech は、最初に写した値のまま
+_RECORD_INDEXED = """
+INSERT OR IGNORE INTO speech_fts_pending (speech_id, indexed, title, context, raw_text, codec, body)
+SELECT s.id, 1, s.title, s.context, s.raw_text, b.codec, b.body
+FROM speeches s
+LEFT JOIN speech_bodies b ON b.speech_id = s.id
+WHERE {where};
+"""
+
+FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER speeches_fts_ai AFTER INSERT ON speeches BEGIN
+      INSERT OR IGNORE INTO speech_fts_pending (speech_id, indexed) VALUES (new.id, 0);
+    END
+    """,
+    f"""
+    CREATE TRIGGER speeches_fts_bd BEFORE DELETE ON speeches BEGIN
+      {_RECORD_INDEXED.format(where="s.id = old.id")}
+    END
+    """,
+    # move_bodies による本文の移し替え（raw_text → NULL だけ。本文は先に speech_bodies に入っている）は
+    # 中身が変わらないので索引し直さない
+    f"""
+    CREATE TRIGGER speeches_fts_bu BEFORE UPDATE OF title, context, raw_text ON speeches
+    WHEN NOT (old.raw_text IS NOT NULL AND new.raw_text IS NULL
+              AND old.title IS new.title AND old.context IS new.context)
+    BEGIN
+      {_RECORD_INDEXED.format(where="s.id = old.id")}
+    END
+    """,
+    # speech_bodies の本文が索引の値なのは raw_text が NULL の speech だけ（raw_text があればそちらが優先）。
+    # INSERT OR REPLACE でも BEFORE INSERT の時点では置き換わる前の行が読める
+    f"""
+    CREATE TRIGGER speech_bodies_fts_bi BEFORE INSERT ON speech_bodies BEGIN
+      {_RECORD_INDEXED.format(where="s.id = new.speech_id AND s.raw_text IS NULL")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER speech_bodies_fts_bu BEFORE UPDATE ON speech_bodies BEGIN
+      {_RECORD_INDEXED.format(where="s.id IN (old.speech_id, new.speech_id) AND s.raw_text IS NULL")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER speech_bodies_fts_bd BEFORE DELETE ON speech_bodies BEGIN
+      {_RECORD_INDEXED.format(where="s.id = old.speech_id AND s.raw_text IS NULL")}
+    END
+    """,
+]
+FTS_TRIGGER_NAMES = [
+    "speeches_fts_ai",
+    "speeches_fts_bd",
+    "speeches_fts_bu",
+    "speech_bodies_fts_bi",
+    "speech_bodies_fts_bu",
+    "speech_bodies_fts_bd",
+    # 旧い定義（speech_fts に直接書いていた頃）
+    "speeches_fts_ad",
+    "speeches_fts_au",
+]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    for table, column, decl in ADD_COLUMNS:
+        if column not in _columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+    for stmt in MIGRATIONS:
+        try:
+            conn.execute(stmt)
+        except sqlite3.IntegrityError as e:
+            # UNIQUE 索引を張れない = 既存データに重複がある
+            raise SystemExit(f"ERROR: migration failed ({e}): {stmt}")
+
+    migrate_fts(conn)
+
+    # raw_text に直接入っている本文（旧データ・外部スクリプトの投入分）を speech_bodies へ移す
+    moved = move_bodies(conn)
+    if moved:
+        print(f"OK: moved {moved} speech bodies to speech_bodies")
+
+    # トリガが積んだ speech（外部スクリプトの投入・手作業の更新を含む）の全文検索索引を組み直す
+    indexed = refresh_fts(conn)
+    if indexed:
+        print(f"OK: reindexed {indexed} speeches for full-text search")
+    conn.execute("PRAGMA optimize")
+
+
+def _fts_tables(conn: sqlite3.Connection) -> dict[str, str]:
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE name IN ('speech_fts', 'speech_bigrams')"
+    ).fetchall()
+    return {r["name"]: r["sql"] for r in rows}
+
+
+def migrate_fts(conn: sqlite3.Connection) -> None:
+    """
+    speech_fts / speech_bigrams を作り、全 speech を speech_fts_pending に積む
+    （中身は migrate の最後に refresh_fts が組む）。trigram が無い SQLite では作らない。
+    """
+    tables = _fts_tables(conn)
+    if tables and not (len(tables) == 2 and all("content=''" in sql for sql in tables.values())):
+        # 平文を持っていた旧い定義（外部コンテンツ表 / 通常の表）: 作り直す
+        for name in FTS_TRIGGER_NAMES:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for name in tables:
+            conn.execute(f"DROP TABLE {name}")
+        conn.execute("DROP TABLE IF EXISTS speech_bigrams_dirty")
+        tables = {}
+
+    if not tables:
+        try:
+            conn.execute(FTS_DDL)
+        except sqlite3.OperationalError as e:
+            # FTS5 / trigram（SQLite 3.34+）が無い: 検索は scripts/_fts.py が走査で代替する
+            print(f"WARN: speech_fts not created ({e}); search falls back to a table scan")
+            return
+        conn.execute(BIGRAM_DDL)
+        conn.execute("DELETE FROM speech_fts_pending")
+        conn.execute("INSERT INTO speech_fts_pending (speech_id, indexed) SELECT id, 0 FROM speeches")
+
+    # トリガは定義が変わっても入れ替わるよう、毎回作り直す
+    for name in FTS_TRIGGER_NAMES:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for stmt in FTS_TRIGGERS:
+        conn.execute(stmt)
+
+
+def init_db(conn: sqlite3.Connection) -> None:
+    conn.executescript(DDL)
+    migrate(conn)
+
+
 def main() -> None:
     with connect() as conn:
-        conn.executescript(DDL)
+        init_db(conn)
     print("OK: init_db done")
 
 if __name__ == "__main__":
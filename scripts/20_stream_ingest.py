@@ -0,0 +1,140 @@
+# scripts/20_stream_ingest.py
+#
+# 官邸ページの取得 → 本文抽出 → チャンク化 → 分類 → 投入 を 1 本の generator の連鎖で流す。
+# kantei_scraper → 30_build_chunks → 40_build_metrics と 3 回テーブルを読み直す代わりに、
+# 取得できた speech から順に、speeches / chunks / chunk_metrics / chunk_builds を
+# --commit-every 本ずつまとめて書く。後から 30/40 を回しても、この分は差分なしで素通りする。
+import argparse
+import importlib
+from collections import Counter
+from itertools import count
+from typing import Iterable, Iterator
+
+from scripts import kantei_scraper as ks
+from scripts._db import batched, bump_generation, connect, get_db_path, move_bodies, next_rowid
+from scripts._fts import refresh_fts
+
+# 数字始まりのモジュール名は import 文で書けないので importlib で読む
+init_db = importlib.import_module("scripts.10_init_db")
+chunks = importlib.import_module("scripts.30_build_chunks")
+metrics = importlib.import_module("scripts.40_build_metrics")
+
+DEFAULT_COMMIT_EVERY = 20
+
+INSERT_SPEECH_SQL = """
+INSERT INTO speeches (id, pm_term_id, pm_name, dt, title, context, raw_text, source_url)
+VALUES (:id, :pm_term_id, :pm_name, :dt, :title, :context, :raw_text, :source_url)
+"""
+
+INSERT_TERM_SQL = """
+INSERT INTO pm_terms (pm_term_id, pm_name, term_start_date, term_end_date, note)
+VALUES (:pm_term_id, :pm_name, :term_start_date, :term_end_date, :note)
+ON CONFLICT(pm_term_id) DO NOTHING
+"""
+
+
+def iter_speech_rows(docs: Iterable[dict], speech_ids: Iterator[int]) -> Iterator[dict]:
+    """fetch_speech の結果に任期・日時を付けて、speeches の INSERT 行にする"""
+    for doc in docs:
+        url = doc["url"]
+        term = ks.term_for_url(url)
+        yield {
+            "id": next(speech_ids),
+            "pm_term_id": term["pm_term_id"],
+            "pm_name": term["pm_name"],
+            "dt": ks.parse_datetime_from_url(url),
+            "title": doc["title"],
+            "context": ks.SPEECH_CONTEXT,
+            "raw_text": doc["body_text"],
+            "source_url": url,
+        }
+
+
+def iter_indexed(
+    speeches: Iterable[dict],
+    max_len: int,
+    terms,
+    chunk_ids: Iterator[int],
+    splitter: str = chunks.DEFAULT_SPLITTER,
+    store_text: bool = True,
+) -> Iterator[tuple[dict, list[dict], list[tuple]]]:
+    """speech 1 本ごとに (speeches 行, chunks 行, chunk_metrics 行) をまとめて返す"""
+    for sp in speeches:
+        chunk_rows = list(
+            chunks.iter_speech_chunk_rows(sp, sp["raw_text"], max_len, chunk_ids, splitter, store_text)
+        )
+        yield sp, chunk_rows, list(metrics.iter_metric_rows(terms, chunk_rows))
+
+
+def write_indexed(conn, indexed: Iterable[tuple], params: str, commit_every: int) -> Counter:
+    """
+    commit_every 本ごとに 4 表へ executemany し、本文の speech_bodies への移し替えと
+    speech_summary / metrics_cube / 全文検索索引・世代の更新も済ませてその都度コミットする
+    （params は chunk_builds に記録する分割条件）
+    """
+    stats: Counter = Counter()
+
+    for batch in batched(indexed, commit_every):
+        speech_rows = [sp for sp, _, _ in batch]
+        chunk_rows = [c for _, cs, _ in batch for c in cs]
+        metric_rows = [m for _, _, ms in batch for m in ms]
+
+        conn.executemany(INSERT_SPEECH_SQL, speech_rows)
+        move_bodies(conn, [sp["id"] for sp in speech_rows])
+        conn.executemany(
+            chunks.UPSERT_BUILD_SQL,
+            [(sp["id"], chunks.text_hash(sp["raw_text"]), params) for sp in speech_rows],
+        )
+        conn.executemany(chunks.INSERT_CHUNK_SQL, chunk_rows)
+        conn.executemany(metrics.UPSERT_METRICS_SQL, metric_rows)
+        metrics.refresh_aggregates(conn, [sp["id"] for sp in speech_rows])
+        refresh_fts(conn)
+        bump_generation(conn)
+        conn.commit()
+
+        stats["speeches"] += len(speech_rows)
+        stats["chunks"] += len(chunk_rows)
+        print(f"OK: committed {stats['speeches']} speeches / {stats['chunks']} chunks")
+
+    return stats
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ks.add_crawler_args(ap)
+    chunks.add_splitter_args(ap)
+    ap.add_argument("--commit-every", type=int, default=DEFAULT_COMMIT_EVERY,
+                    help="何 speech ごとにまとめて書き込むか")
+    args = ap.parse_args()
+
+    crawler = ks.crawler_from_args(args)
+
+    print("=== 官邸サイトから取得し、そのままチャンク化・分類して投入します ===")
+
+    with connect() as conn, crawler:
+        init_db.init_db(conn)
+        conn.executemany(INSERT_TERM_SQL, list(ks.PM_TERMS.values()))
+        conn.commit()
+
+        terms = metrics.TermTable.load(conn)
+        known = ks.load_known_urls(get_db_path())
+        items = ks.collect_candidates(args.list_url or [ks.STATEMENT_LIST_URL], args.limit, crawler, known)
+
+        docs = ks.iter_fetched(items, crawler, ks.get_extractor(args.extractor))
+        speeches = iter_speech_rows(docs, count(next_rowid(conn, "speeches")))
+        store_text = not args.offsets_only
+        indexed = iter_indexed(
+            speeches, args.max_len, terms, count(next_rowid(conn, "chunks")), args.splitter, store_text
+        )
+        params = chunks.splitter_params(args.max_len, args.splitter, store_text)
+        stats = write_indexed(conn, indexed, params, args.commit_every)
+
+    ks.print_http_stats(crawler)
+    print(
+        f"OK: stream ingest done: speeches={stats['speeches']} chunks={stats['chunks']}"
+        f" (rules_version={metrics.RULES_VERSION})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,107 +1,393 @@
 # scripts/30_build_chunks.py
 import argparse
 import re
-from scripts._db import connect
+from collections import Counter
+from itertools import count
+from typing import Callable, Iterable, Iterator, Optional
+from scripts._db import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_PAGE_SIZE,
+    body_hash,
+    bump_generation,
+    connect,
+    executemany_batched,
+    get_generation,
+    iter_pages,
+    next_rowid,
+    read_body,
+)
 
+# iter_spans / is_noise_line の出力が変わる修正をしたら上げる（全 speech が再チャンク対象になる）
+# v2: chunks に char_start / char_end を持たせた
+SPLITTER_VERSION = 2
 
-def is_noise_line(s: str) -> bool:
-    t = (s or "").strip()
-    if not t:
-        return True
+# fixed    : 段落を max_len 文字ごとに機械的に切る（従来の split_text と同じ出力）
+# sentence : max_len 以内で最後の「。」か改行の直後で切る（文の途中で切らない）
+SPLITTERS = ("sentence", "fixed")
+DEFAULT_SPLITTER = "sentence"
+SENTENCE_BREAKS = ("。", "\n")
 
-    # 0) 官邸ナビ断片が「塊」として入ってきた場合を落とす
-    # 例:
-    # 第103代\n石破 茂\n開く\n閉じる
-    if ("開く" in t and "閉じる" in t and "第" in t and "代" in t):
-        return True
+# id は自前で採番する（投入済みチャンクをそのまま 40_build_metrics に流せるように）
+# 行は dict で渡し、pm_term_id / dt など INSERT に使わないキーは無視される。
+# stored_text は offsets-only のとき ''（chunk_text は分類用に常に本文を持つ）
+INSERT_CHUNK_SQL = """
+INSERT INTO chunks (id, speech_id, text, order_in_speech, char_start, char_end)
+VALUES (:chunk_id, :speech_id, :stored_text, :order_in_speech, :char_start, :char_end)
+"""
 
-    # 1) 官邸ページのナビ断片（単独行）
-    if t in {"関連リンク", "開く", "閉じる"}:
-        return True
-    if re.match(r"^第\d+代$", t):      # 例: 第103代
-        return True
-    if re.match(r"^令和\d+年$", t):    # 例: 令和7年
-        return True
-    # 「石破 茂」など、人名だけが単独で出る短文
-    if re.match(r"^[一-龥]{2,}\s+[一-龥]{2,}$", t) and len(t) <= 10:
-        return True
+# 本文は読まない（差分判定は speech_bodies.text_hash で行い、再チャンクする speech だけ展開する）
+# raw_text は本文表へ移される前の speech だけが持つ
+SPEECH_PAGE_SQL = """
+SELECT s.id, s.raw_text, s.pm_term_id, s.dt, sb.text_hash AS body_hash, b.text_hash, b.params
+FROM speeches s
+LEFT JOIN speech_bodies sb ON sb.speech_id = s.id
+LEFT JOIN chunk_builds b ON b.speech_id = s.id
+WHERE s.id > :after
+ORDER BY s.id
+LIMIT :limit
+"""
 
-    # 2) 典型的な官邸サイトのUI/メタ文言
-    noise_phrases = [
-        "当サイトではJavaScriptを使用しております",
-        "ブラウザの設定でJavaScriptを有効",
-        "総理の演説・記者会見など",
-        "首相官邸ホームページ",
-        "動画が再生できない方は",
-        "政府広報オンライン",
-        "ツイート",
-        "更新日：",
-    ]
-    if any(p in t for p in noise_phrases):
-        return True
+DELETE_SPEECH_METRICS_SQL = """
+DELETE FROM chunk_metrics
+WHERE chunk_id IN (SELECT id FROM chunks WHERE speech_id = ?)
+"""
+DELETE_SPEECH_CHUNKS_SQL = "DELETE FROM chunks WHERE speech_id = ?"
+
+UPSERT_BUILD_SQL = """
+INSERT OR REPLACE INTO chunk_builds (speech_id, text_hash, params)
+VALUES (?, ?, ?)
+"""
+
+# speeches 側から消えた行のチャンク・メトリクス・ビルド記録を掃除する
+DELETE_ORPHANS_SQL = [
+    """
+    DELETE FROM chunk_metrics
+    WHERE chunk_id IN (
+      SELECT c.id FROM chunks c
+      WHERE NOT EXISTS (SELECT 1 FROM speeches s WHERE s.id = c.speech_id)
+    )
+    """,
+    "DELETE FROM chunks WHERE NOT EXISTS (SELECT 1 FROM speeches s WHERE s.id = chunks.speech_id)",
+    "DELETE FROM chunk_builds WHERE NOT EXISTS (SELECT 1 FROM speeches s WHERE s.id = chunk_builds.speech_id)",
+    "DELETE FROM speech_bodies WHERE NOT EXISTS (SELECT 1 FROM speeches s WHERE s.id = speech_bodies.speech_id)",
+]
+
+
+# ── ノイズ行の規則（上から順に判定し、最初に当たった規則の名前で数える） ──
+
+# 官邸ページのナビ断片（単独行）
+NOISE_EXACT_LINES = frozenset({"関連リンク", "開く", "閉じる"})
+
+# 官邸ナビ断片が「塊」として入ってきた場合（例: 第103代\n石破 茂\n開く\n閉じる）は、
+# これらの語を全て含むものを落とす
+NOISE_NAV_BLOCK_WORDS = ("開く", "閉じる", "第", "代")
+
+NOISE_LINE_PATTERNS = [
+    ("term_number", r"^第\d+代$"),                    # 例: 第103代
+    ("era_year", r"^令和\d+年$"),                     # 例: 令和7年
+    ("person_name", r"^[一-龥]{2,}\s+[一-龥]{2,}$"),  # 「石破 茂」など、人名だけの短文（NOISE_NAME_MAX_LEN 以下）
+]
+NOISE_NAME_MAX_LEN = 10
 
-    # 3) パンくずや区切りっぽい短文を落とす（調整可）
-    if len(t) <= 3:
+# 典型的な官邸サイトのUI/メタ文言（部分一致）
+NOISE_PHRASES = [
+    "当サイトではJavaScriptを使用しております",
+    "ブラウザの設定でJavaScriptを有効",
+    "総理の演説・記者会見など",
+    "首相官邸ホームページ",
+    "動画が再生できない方は",
+    "政府広報オンライン",
+    "ツイート",
+    "更新日：",
+]
+
+# パンくずや区切りっぽい短文を落とす（調整可）
+NOISE_SHORT_MAX_LEN = 3
+
+
+class NoiseFilter:
+    """
+    is_noise_line の規則をコンパイル済みで持つフィルタ。
+    呼ぶたびに当たった規則ごとの件数を hits に数える（どの規則が実際に効いているかの確認用）。
+    """
+
+    def __init__(self) -> None:
+        self.patterns = [(name, re.compile(p)) for name, p in NOISE_LINE_PATTERNS]
+        self.phrase_re = re.compile("|".join(map(re.escape, NOISE_PHRASES)))
+        self.hits: Counter = Counter()
+
+    def match(self, s: str) -> Optional[str]:
+        """ノイズなら当たった規則の名前、そうでなければ None"""
+        t = (s or "").strip()
+        if not t:
+            return "empty"
+        if all(w in t for w in NOISE_NAV_BLOCK_WORDS):
+            return "nav_block"
+        if t in NOISE_EXACT_LINES:
+            return "exact_line"
+        for name, pat in self.patterns:
+            if pat.match(t) and (name != "person_name" or len(t) <= NOISE_NAME_MAX_LEN):
+                return name
+        if self.phrase_re.search(t):
+            return "phrase"
+        if len(t) <= NOISE_SHORT_MAX_LEN:
+            return "short"
+        return None
+
+    def __call__(self, s: str) -> bool:
+        rule = self.match(s)
+        if rule is None:
+            return False
+        self.hits[rule] += 1
         return True
 
-    return False
+    def report(self) -> str:
+        return ", ".join(f"{name}={n}" for name, n in self.hits.most_common()) or "(no hits)"
+
+
+NOISE_FILTER = NoiseFilter()
+
+
+def is_noise_line(s: str) -> bool:
+    return NOISE_FILTER(s)
+
+
+def _strip_span(raw: str, start: int, end: int) -> tuple[int, int]:
+    """raw[start:end].strip() に当たる範囲（コピーせずに位置だけ動かす）"""
+    while start < end and raw[start].isspace():
+        start += 1
+    while end > start and raw[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _paragraph_spans(raw: str) -> Iterator[tuple[int, int]]:
+    """raw.split("\n\n") の各段落を strip した範囲（空段落は飛ばす）"""
+    pos = 0
+    while True:
+        sep = raw.find("\n\n", pos)
+        end = len(raw) if sep < 0 else sep
+        start, end = _strip_span(raw, pos, end)
+        if start < end:
+            yield start, end
+        if sep < 0:
+            return
+        pos = sep + 2
 
 
-def split_text(raw: str, max_len: int) -> list[str]:
-    paras = [p.strip() for p in (raw or "").split("\n\n") if p.strip()]
-    out: list[str] = []
-    for p in paras:
-        if len(p) <= max_len:
-            out.append(p)
+def _fixed_cuts(raw: str, start: int, end: int, max_len: int) -> Iterator[tuple[int, int]]:
+    for i in range(start, end, max_len):
+        yield i, min(i + max_len, end)
+
+
+def _sentence_cuts(raw: str, start: int, end: int, max_len: int) -> Iterator[tuple[int, int]]:
+    while end - start > max_len:
+        limit = start + max_len
+        brk = max(raw.rfind(b, start + 1, limit) for b in SENTENCE_BREAKS)
+        # 区切りが見つからなければ max_len で切る
+        cut = brk + 1 if brk > start else limit
+        yield start, cut
+        start = cut
+    yield start, end
+
+
+def iter_spans(
+    raw: str,
+    max_len: int,
+    splitter: str = DEFAULT_SPLITTER,
+    noise: Optional[NoiseFilter] = None,
+) -> Iterator[tuple[int, int]]:
+    """
+    raw を 1 回なめて、チャンクを raw 上の (start, end) で順に返す。
+    各チャンクは strip 済みの範囲で、長さは max_len 以下。ノイズ行は飛ばす。
+    """
+    raw = raw or ""
+    cuts = _sentence_cuts if splitter == "sentence" else _fixed_cuts
+    noise = noise or NOISE_FILTER
+    for p_start, p_end in _paragraph_spans(raw):
+        if p_end - p_start <= max_len:
+            parts: Iterable[tuple[int, int]] = ((p_start, p_end),)
         else:
-            for i in range(0, len(p), max_len):
-                part = p[i:i + max_len].strip()
-                if part:
-                    out.append(part)
+            parts = cuts(raw, p_start, p_end, max_len)
+        for start, end in parts:
+            start, end = _strip_span(raw, start, end)
+            if start < end and not noise(raw[start:end]):
+                yield start, end
+
+
+def split_text(raw: str, max_len: int, noise: Optional[NoiseFilter] = None) -> list[str]:
+    """従来の固定長分割（iter_spans の fixed と同じ）"""
+    raw = raw or ""
+    return [raw[s:e] for s, e in iter_spans(raw, max_len, "fixed", noise)]
+
+
+def text_hash(raw: str) -> str:
+    return body_hash(raw)
+
+
+def splitter_params(max_len: int, splitter: str = DEFAULT_SPLITTER, store_text: bool = True) -> str:
+    """chunk_builds.params に記録する分割条件（変われば再チャンク）"""
+    params = f"{splitter}/v{SPLITTER_VERSION};max_len={max_len}"
+    return params if store_text else f"{params};offsets_only"
+
+
+def add_splitter_args(ap) -> None:
+    ap.add_argument("--max-len", type=int, default=600)
+    ap.add_argument("--splitter", choices=SPLITTERS, default=DEFAULT_SPLITTER,
+                    help="sentence = 「。」/改行で切る, fixed = max_len ごとに切る（従来）")
+    ap.add_argument("--offsets-only", action="store_true",
+                    help="chunks.text を保存せず、raw_text 上の位置だけを持つ")
+
+
+def iter_speech_chunk_rows(
+    speech,
+    raw: str,
+    max_len: int,
+    chunk_ids: Iterator[int],
+    splitter: str = DEFAULT_SPLITTER,
+    store_text: bool = True,
+) -> Iterator[dict]:
+    """1 speech 分の chunks の INSERT 行（speech は id / pm_term_id / dt を持つ行か dict）"""
+    for order, (start, end) in enumerate(iter_spans(raw, max_len, splitter), start=1):
+        text = raw[start:end]
+        yield {
+            "chunk_id": next(chunk_ids),
+            "speech_id": speech["id"],
+            "chunk_text": text,
+            "stored_text": text if store_text else "",
+            "order_in_speech": order,
+            "char_start": start,
+            "char_end": end,
+            "pm_term_id": speech["pm_term_id"],
+            "dt": speech["dt"],
+        }
 
-    # ノイズ除去
-    out = [x for x in out if not is_noise_line(x)]
-    return out
+
+def iter_changed_chunk_rows(
+    conn,
+    pages: Iterable[list],
+    max_len: int,
+    force: bool = False,
+    dry_run: bool = False,
+    stats: Optional[Counter] = None,
+    splitter: str = DEFAULT_SPLITTER,
+    store_text: bool = True,
+) -> Iterator[dict]:
+    """
+    本文ハッシュか分割条件が前回ビルドと違う speech だけを分割し、chunks の INSERT 行を返す。
+    対象 speech の旧チャンク・メトリクスの削除とビルド記録の更新は、ページ単位でここで行う。
+    行には分類に要る pm_term_id / dt も載せる（40_build_metrics.iter_metric_rows がそのまま読める形）。
+    """
+    params = splitter_params(max_len, splitter, store_text)
+    stats = stats if stats is not None else Counter()
+    chunk_ids = count(next_rowid(conn, "chunks"))
+
+    for page in pages:
+        changed = []
+        for sp in page:
+            raw = sp["raw_text"]
+            if raw is not None:
+                h = text_hash(raw)
+            else:
+                h = sp["body_hash"] or text_hash("")
+            if not force and sp["text_hash"] == h and sp["params"] == params:
+                stats["unchanged"] += 1
+                continue
+            changed.append((sp, raw, h))
+
+        if not changed:
+            continue
+        stats["changed"] += len(changed)
+
+        if not dry_run:
+            ids = [(sp["id"],) for sp, _, _ in changed]
+            conn.executemany(DELETE_SPEECH_METRICS_SQL, ids)
+            conn.executemany(DELETE_SPEECH_CHUNKS_SQL, ids)
+            conn.executemany(UPSERT_BUILD_SQL, [(sp["id"], h, params) for sp, _, h in changed])
+
+        for sp, raw, _ in changed:
+            if raw is None:
+                # 再チャンクする speech だけ本文を展開する
+                raw = read_body(conn, sp["id"]) or ""
+            yield from iter_speech_chunk_rows(sp, raw, max_len, chunk_ids, splitter, store_text)
+
+
+def build_chunks(
+    conn,
+    max_len: int = 600,
+    rebuild: bool = False,
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    on_batch: Optional[Callable[[list[dict]], None]] = None,
+    splitter: str = DEFAULT_SPLITTER,
+    store_text: bool = True,
+) -> Counter:
+    """
+    チャンク化ステージ本体。コミットはしない（呼び出し側のトランザクションにまとめる）。
+    on_batch を渡すと、投入し終えたチャンク行がバッチごとに渡される（run_pipeline が分類に流す）。
+    戻り値: Counter(chunks=投入数, changed=再チャンクした speech 数, unchanged=据え置き数)
+    """
+    if conn.execute("SELECT 1 FROM speeches LIMIT 1").fetchone() is None:
+        raise SystemExit("ERROR: speeches is empty")
+
+    if rebuild:
+        if dry_run:
+            print("DRY-RUN: would delete chunk_metrics, chunks and chunk_builds")
+        else:
+            conn.execute("DELETE FROM chunk_metrics;")
+            conn.execute("DELETE FROM chunks;")
+            conn.execute("DELETE FROM chunk_builds;")
+            print("OK: cleared chunk_metrics/chunks/chunk_builds")
+    elif not dry_run:
+        for stmt in DELETE_ORPHANS_SQL:
+            conn.execute(stmt)
+
+    # 全件を抱えず、id 範囲で 1 ページずつ読む
+    pages = iter_pages(conn, SPEECH_PAGE_SQL, page_size=page_size)
+    stats: Counter = Counter()
+    rows = iter_changed_chunk_rows(
+        conn, pages, max_len, force=rebuild, dry_run=dry_run, stats=stats,
+        splitter=splitter, store_text=store_text,
+    )
+
+    if dry_run:
+        stats["chunks"] = sum(1 for _ in rows)
+    else:
+        stats["chunks"] = executemany_batched(
+            conn, INSERT_CHUNK_SQL, rows, batch_size, label="chunks", on_batch=on_batch
+        )
+    return stats
 
 
 def main() -> None:
     ap = argparse.ArgumentParser()
-    ap.add_argument("--max-len", type=int, default=600)
-    ap.add_argument("--rebuild", action="store_true")
+    add_splitter_args(ap)
+    ap.add_argument("--rebuild", action="store_true", help="差分ではなく全 speech を作り直す")
     ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    ap.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="speeches の読み出し単位")
     args = ap.parse_args()
 
+    # 削除から投入までを 1 トランザクションにまとめる（コミットは with を抜けるとき）
     with connect() as conn:
-        speeches = conn.execute("SELECT id, raw_text FROM speeches ORDER BY id").fetchall()
-        if not speeches:
-            raise SystemExit("ERROR: speeches is empty")
+        stats = build_chunks(
+            conn,
+            max_len=args.max_len,
+            rebuild=args.rebuild,
+            dry_run=args.dry_run,
+            batch_size=args.batch_size,
+            page_size=args.page_size,
+            splitter=args.splitter,
+            store_text=not args.offsets_only,
+        )
+        generation = get_generation(conn) if args.dry_run else bump_generation(conn)
 
-        if args.rebuild:
-            if args.dry_run:
-                print("DRY-RUN: would delete chunk_metrics and chunks")
-            else:
-                conn.execute("DELETE FROM chunk_metrics;")
-                conn.execute("DELETE FROM chunks;")
-                conn.commit()
-                print("OK: cleared chunk_metrics/chunks")
-
-        total = 0
-        for sp in speeches:
-            sid = sp["id"]
-            parts = split_text(sp["raw_text"] or "", args.max_len)
-            for order, text in enumerate(parts, start=1):
-                total += 1
-                if args.dry_run:
-                    continue
-                conn.execute(
-                    "INSERT INTO chunks (speech_id, text, order_in_speech) VALUES (?, ?, ?)",
-                    (sid, text, order),
-                )
-
-        if not args.dry_run:
-            conn.commit()
-
-    print(f"OK: chunks built: {total} (dry_run={args.dry_run})")
+    print(
+        f"OK: chunks built: {stats['chunks']} from {stats['changed']} speeches"
+        f" (unchanged={stats['unchanged']}, generation={generation}, dry_run={args.dry_run})"
+    )
+    print(f"   noise lines dropped: {NOISE_FILTER.report()}")
 
 
 if __name__ == "__main__":
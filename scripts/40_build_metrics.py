@@ -1,10 +1,147 @@
 # scripts/40_build_metrics.py
 import argparse
+import hashlib
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date
-from typing import Tuple
-from scripts._db import connect
+from typing import Iterable, Iterator, Optional, Tuple
+from scripts._db import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_PAGE_SIZE,
+    bump_generation,
+    connect,
+    executemany_batched,
+    get_generation,
+    iter_pages,
+    read_body,
+)
 import re
 
+# メトリクスが無い、規則バージョンが古い、または speech の日付・任期が書き換わったチャンクだけを読む
+# （dt が空の speech は分類した日の日付で書くので、日付の比較はしない。
+#   30_build_chunks --offsets-only のチャンクは text が '' なので、resolve_chunk_texts が本文から切り出す）
+CHUNK_PAGE_SQL = """
+SELECT
+  c.id AS chunk_id,
+  c.speech_id AS speech_id,
+  c.text AS chunk_text,
+  c.char_start AS char_start,
+  c.char_end AS char_end,
+  s.pm_term_id AS pm_term_id,
+  s.dt AS dt
+FROM chunks c
+JOIN speeches s ON s.id = c.speech_id
+LEFT JOIN chunk_metrics m ON m.chunk_id = c.id
+WHERE c.id > :after
+  AND (m.chunk_id IS NULL
+       OR m.rules_version IS NOT :rules_version
+       OR m.pm_term_id IS NOT s.pm_term_id
+       OR (COALESCE(s.dt, '') <> '' AND m.date IS NOT SUBSTR(s.dt, 1, 10)))
+ORDER BY c.id
+LIMIT :limit
+"""
+
+UPSERT_METRICS_SQL = """
+INSERT OR REPLACE INTO chunk_metrics
+(chunk_id, pm_term_id, date, category, depth_level, origin_phase, rules_version)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+PHASE_KEYS_SQL = "SELECT DISTINCT pm_term_id, date FROM chunk_metrics"
+
+UPDATE_PHASE_SQL = """
+UPDATE chunk_metrics SET origin_phase = ?
+WHERE pm_term_id = ? AND date = ? AND origin_phase IS NOT ?
+"""
+
+# 1 speech 分の線ビュー集約を作り直す（メトリクスが無くなった speech は DELETE だけで消える）
+DELETE_SUMMARY_SQL = "DELETE FROM speech_summary WHERE speech_id = ?"
+
+INSERT_SUMMARY_SQL = """
+WITH cat_counts AS (
+  SELECT m.category, COUNT(*) AS n
+  FROM chunks c
+  JOIN chunk_metrics m ON m.chunk_id = c.id
+  WHERE c.speech_id = :speech_id
+  GROUP BY m.category
+)
+INSERT INTO speech_summary
+(speech_id, pm_term_id, pm_name, dt, volume_chars, n_chunks, depth_max, origin_phase_avg, category_mode)
+SELECT
+  s.id, s.pm_term_id, s.pm_name, s.dt,
+  COALESCE(s.char_count, LENGTH(s.raw_text), 0),
+  COUNT(*),
+  MAX(m.depth_level),
+  AVG(m.origin_phase),
+  COALESCE((
+    SELECT GROUP_CONCAT(category, ' / ')
+    FROM (
+      SELECT category FROM cat_counts
+      WHERE n = (SELECT MAX(n) FROM cat_counts)
+      ORDER BY category
+    )
+  ), '')
+FROM speeches s
+JOIN chunks c ON c.speech_id = s.id
+JOIN chunk_metrics m ON m.chunk_id = c.id
+WHERE s.id = :speech_id
+GROUP BY s.id
+"""
+
+# 集約が無い speech（移行直後など）と、speeches 側の dt / 首相が書き換わった speech
+STALE_SUMMARY_SQL = """
+SELECT s.id
+FROM speeches s
+LEFT JOIN speech_summary ss ON ss.speech_id = s.id
+WHERE (ss.speech_id IS NULL AND EXISTS (SELECT 1 FROM chunks c WHERE c.speech_id = s.id))
+   OR (ss.speech_id IS NOT NULL
+       AND (ss.dt IS NOT s.dt OR ss.pm_name IS NOT s.pm_name OR ss.pm_term_id IS NOT s.pm_term_id))
+"""
+
+# speech やメトリクスが消えた集約（refresh_aggregates に渡すと DELETE だけで消える）
+ORPHAN_SUMMARIES_SQL = """
+SELECT speech_id FROM speech_summary
+WHERE NOT EXISTS (
+  SELECT 1 FROM chunks c
+  JOIN chunk_metrics m ON m.chunk_id = c.id
+  WHERE c.speech_id = speech_summary.speech_id
+)
+"""
+
+# metrics_cube の 1 セル群 = (任期, 月) を数え直す（idx_chunk_metrics_term_date の範囲で読む）
+DELETE_CUBE_SQL = "DELETE FROM metrics_cube WHERE pm_term_id = :pm_term_id AND month = :month"
+
+INSERT_CUBE_SQL = """
+INSERT INTO metrics_cube (pm_term_id, month, category, depth_level, n_chunks)
+SELECT pm_term_id, :month, category, depth_level, COUNT(*)
+FROM chunk_metrics
+WHERE pm_term_id = :pm_term_id
+  AND date >= :month AND date < :month || '~'
+GROUP BY category, depth_level
+"""
+
+# speech が載っている (任期, 月)。集約の更新前に読めば旧い位置、更新後に読めば今の位置
+SUMMARY_CUBE_KEYS_SQL = """
+SELECT pm_term_id, SUBSTR(dt, 1, 7) AS month FROM speech_summary WHERE speech_id = ?
+"""
+
+METRICS_CUBE_KEYS_SQL = """
+SELECT DISTINCT m.pm_term_id, SUBSTR(m.date, 1, 7) AS month
+FROM chunks c
+JOIN chunk_metrics m ON m.chunk_id = c.id
+WHERE c.speech_id = ?
+"""
+
+# キューブが空（移行直後・--rebuild 後）なら全 (任期, 月) を数える
+ALL_CUBE_KEYS_SQL = "SELECT DISTINCT pm_term_id, SUBSTR(date, 1, 7) AS month FROM chunk_metrics"
+
+PHASE_SPEECHES_SQL = """
+SELECT DISTINCT c.speech_id
+FROM chunk_metrics m
+JOIN chunks c ON c.id = m.chunk_id
+WHERE m.pm_term_id = ? AND m.date = ?
+"""
+
 CATEGORIES = [
     "経済・財政",
     "治安・犯罪対策",   # ← 追加
@@ -29,19 +166,7 @@ def _parse_date(d: str) -> date:
         return datetime.strptime(d[:10], "%Y-%m-%d").date()
     raise ValueError(f"invalid date: {d}")
 
-def calc_origin_phase(conn, pm_term_id: str, d_str: str) -> float:
-    row = conn.execute(
-        "SELECT term_start_date, term_end_date FROM pm_terms WHERE pm_term_id=?",
-        (pm_term_id,),
-    ).fetchone()
-    if row is None:
-        # 任期情報がない場合は 0.0 に倒す（復旧の安全側）
-        return 0.0
-
-    start = _parse_date(row["term_start_date"])
-    end = _parse_date(row["term_end_date"]) if row["term_end_date"] else date.today()
-    target = _parse_date(d_str)
-
+def _phase(start: date, end: date, target: date) -> float:
     if target <= start:
         return 0.0
     if target >= end:
@@ -51,155 +176,427 @@ def calc_origin_phase(conn, pm_term_id: str, d_str: str) -> float:
     pos_days = (target - start).days
     return pos_days / total_days
 
-QNA_MARKERS = ["【質疑応答】", "（記者）", "（司会）"]
-
-def classify_chunk(text: str) -> Tuple[str, int]:
-    t = (text or "").strip()
-
-    # 0) 構造・Q&A（最優先）
-    if (
-        any(k in t for k in QNA_MARKERS)
-        or t.startswith("（記者")
-    ):
-        category = "Q&A・記者質問"
-
-    # 発話者タグ： （高市総理）だけ、みたいな行
-    elif re.fullmatch(r"（[^）]{1,12}）", t):
-        category = "構造・見出し"
-
-    # 質問者の名乗り（通信社/新聞/テレビ等）："…と申します"
-    elif ("と申します" in t) and any(k in t for k in ["通信", "新聞", "テレビ", "放送", "共同", "時事", "NHK", "ロイター", "Reuters"]):
-        category = "Q&A・記者質問"
 
-    # 進行・受け答えの短文
-    elif len(t) <= 30 and any(k in t for k in ["どうぞ", "大丈夫です", "お願いいたします", "ありがとうございます"]):
-        category = "構造・見出し"
+class TermTable:
+    """
+    pm_terms を 1 回だけ読み、任期ごとの (開始日, 終了日) を解釈済みで持つ。
+    終了日が無い現任期は、読み込んだ日を終了日とみなす。
+    origin_phase は (任期, 日付) ごとに 1 回だけ計算し、同じ speech の全チャンクで使い回す。
+    """
 
+    def __init__(self, terms: dict[str, tuple[date, date]]) -> None:
+        self.terms = terms
+        self._memo: dict[tuple[str, str], float] = {}
 
-    # 0) 経済・財政（国内政治・制度より先に拾う：用語が明確）
-    elif any(k in t for k in ["景気", "物価", "GDP", "成長", "税", "財政", "賃上げ", "投資", "金融"]):
-        category = "経済・財政"
-
+    @classmethod
+    def load(cls, conn) -> "TermTable":
+        today = date.today()
+        rows = conn.execute(
+            "SELECT pm_term_id, term_start_date, term_end_date FROM pm_terms"
+        ).fetchall()
+        return cls({
+            r["pm_term_id"]: (
+                _parse_date(r["term_start_date"]),
+                _parse_date(r["term_end_date"]) if r["term_end_date"] else today,
+            )
+            for r in rows
+        })
 
-    # 1) 治安・犯罪対策（新設）
-    elif any(k in t for k in [
-        "治安", "犯罪", "テロ", "詐欺", "闇バイト", "ストーカー", "DV", "配偶者からの暴力",
-        "性犯罪", "児童虐待", "被害者", "加害者", "暴力", "取り締まり", "検挙",
-        "法規制", "規制強化"
-    ]):
-        category = "治安・犯罪対策"    
+    def origin_phase(self, pm_term_id: str, d_str: str) -> float:
+        key = (pm_term_id, d_str)
+        phase = self._memo.get(key)
+        if phase is None:
+            term = self.terms.get(pm_term_id)
+            # 任期情報がない場合は 0.0 に倒す（復旧の安全側）
+            phase = _phase(*term, _parse_date(d_str)) if term else 0.0
+            self._memo[key] = phase
+        return phase
 
 
-    # 2) 国内政治・制度（先に拾う：用語が明確）
-    elif any(k in t for k in [
-        "国会", "委員会", "法案", "改正", "制度", "政党", "選挙", "公職選挙法",
-        "政治改革", "行政改革", "統治機構", "憲法", "内閣", "閣議", "与党", "野党"
-    ]):
-        category = "国内政治・制度"
+def calc_origin_phase(conn, pm_term_id: str, d_str: str) -> float:
+    """単発用。まとめて計算するときは TermTable.load(conn) を使い回す"""
+    return TermTable.load(conn).origin_phase(pm_term_id, d_str)
 
-    # 3) 災害・危機
-    elif any(k in t for k in ["地震", "災害", "台風", "被災", "復旧", "危機", "感染症"]):
-        category = "災害・危機対応"
+# ─────────────────────────────
+# 分類規則（モジュール読み込み時に 1 回だけ組み立てる）
+# ─────────────────────────────
 
-    # 4) 福祉
-    elif any(k in t for k in ["年金", "介護", "医療", "社会保障", "生活保護", "福祉"]):
-        category = "福祉・社会保障"
+QNA_MARKERS = ["【質疑応答】", "（記者）", "（司会）"]
+QNA_PREFIX = "（記者"
 
-    # 5) 教育
-    elif any(k in t for k in ["教育", "学校", "子育て", "保育", "少子化", "奨学金"]):
-        category = "教育・子育て"
+# 発話者タグ： （高市総理）だけ、みたいな行
+SPEAKER_TAG_RE = re.compile(r"（[^）]{1,12}）")
 
-    # 6) 科学技術・デジタル
-    elif any(k in t for k in ["デジタル", "AI", "DX", "科学技術", "研究開発", "半導体"]):
-        category = "科学技術・デジタル"
+# 質問者の名乗り（通信社/新聞/テレビ等）："…と申します"
+SELF_INTRO = "と申します"
+PRESS_NAMES = ["通信", "新聞", "テレビ", "放送", "共同", "時事", "NHK", "ロイター", "Reuters"]
 
-    # 7) 外交・安全保障（軍事寄り）
-    elif any(k in t for k in ["防衛", "安全保障", "自衛隊", "安保", "抑止", "ミサイル", "侵略"]):
-        category = "外交・安全保障"
+# 進行・受け答えの短文
+ACK_MAX_LEN = 30
+ACK_PHRASES = ["どうぞ", "大丈夫です", "お願いいたします", "ありがとうございます"]
 
-    # 8) 外交・首脳外交（会談・国際会議寄り）
-    elif any(k in t for k in [
+# テーマ語彙（上から順に優先。先に当たったカテゴリを採用）
+KEYWORD_RULES: list[tuple[str, list[str]]] = [
+    # 経済・財政（国内政治・制度より先に拾う：用語が明確）
+    ("経済・財政", ["景気", "物価", "GDP", "成長", "税", "財政", "賃上げ", "投資", "金融"]),
+    ("治安・犯罪対策", [
+        "治安", "犯罪", "テロ", "詐欺", "闇バイト", "ストーカー", "DV", "配偶者からの暴力",
+        "性犯罪", "児童虐待", "被害者", "加害者", "暴力", "取り締まり", "検挙",
+        "法規制", "規制強化",
+    ]),
+    ("国内政治・制度", [
+        "国会", "委員会", "法案", "改正", "制度", "政党", "選挙", "公職選挙法",
+        "政治改革", "行政改革", "統治機構", "憲法", "内閣", "閣議", "与党", "野党",
+    ]),
+    ("災害・危機対応", ["地震", "災害", "台風", "被災", "復旧", "危機", "感染症"]),
+    ("福祉・社会保障", ["年金", "介護", "医療", "社会保障", "生活保護", "福祉"]),
+    ("教育・子育て", ["教育", "学校", "子育て", "保育", "少子化", "奨学金"]),
+    ("科学技術・デジタル", ["デジタル", "AI", "DX", "科学技術", "研究開発", "半導体"]),
+    # 外交・安全保障（軍事寄り）
+    ("外交・安全保障", ["防衛", "安全保障", "自衛隊", "安保", "抑止", "ミサイル", "侵略"]),
+    # 外交・首脳外交（会談・国際会議寄り）
+    ("外交・首脳外交", [
         "首脳", "首脳会談", "会談", "会合", "国際会議", "サミット",
         "訪問", "外遊", "共同声明", "首相", "大統領", "国家主席", "外相",
         "ＡＰＥＣ", "APEC", "Ｇ７", "G7", "Ｇ２０", "G20", "国連", "UN",
-        "ＡＳＥＡＮ", "ASEAN", "ＥＵ", "EU"
-    ]):
-        category = "外交・首脳外交"
+        "ＡＳＥＡＮ", "ASEAN", "ＥＵ", "EU",
+    ]),
+]
 
+# 深さ：文字数がこの閾値未満なら 0, 1, 2。以上は 3
+DEPTH_THRESHOLDS = (80, 250, 600)
+
+# 構造系ルールの語彙に付けるタグ（カテゴリ名と衝突しない名前にする）
+_TAG_QNA = "@qna"
+_TAG_INTRO = "@intro"
+_TAG_PRESS = "@press"
+_TAG_ACK = "@ack"
+
+
+def _build_keyword_matcher(
+    groups: list[tuple[str, list[str]]],
+) -> tuple["re.Pattern[str]", dict[str, frozenset[str]]]:
+    """
+    全語彙を 1 本の正規表現にまとめ、1 回の走査で出現語をすべて拾えるようにする。
+      - 先読み (?=(...)) で各位置から照合するので、重なり合う語も取りこぼさない
+      - 同じ位置では長い語を優先し、その語に含まれる短い語のタグも一緒に返す
+      - 先頭文字クラスで、語の始まりになり得ない位置を C レベルで読み飛ばす
+    """
+    tags: dict[str, set[str]] = {}
+    for tag, words in groups:
+        for w in words:
+            tags.setdefault(w, set()).add(tag)
+
+    words = sorted(tags, key=len, reverse=True)
+    closure = {
+        w: frozenset().union(*(tags[v] for v in words if v in w))
+        for w in words
+    }
+    first = "".join(sorted({re.escape(w[0]) for w in words}))
+    alts = "|".join(re.escape(w) for w in words)
+    return re.compile(f"(?=[{first}])(?=({alts}))"), closure
+
+
+_KEYWORD_RE, _KEYWORD_TAGS = _build_keyword_matcher(
+    [
+        (_TAG_QNA, QNA_MARKERS),
+        (_TAG_INTRO, [SELF_INTRO]),
+        (_TAG_PRESS, PRESS_NAMES),
+        (_TAG_ACK, ACK_PHRASES),
+        *KEYWORD_RULES,
+    ]
+)
+
+
+def _rules_digest() -> str:
+    payload = repr((
+        QNA_MARKERS, QNA_PREFIX, SPEAKER_TAG_RE.pattern, SELF_INTRO, PRESS_NAMES,
+        ACK_MAX_LEN, ACK_PHRASES, KEYWORD_RULES, DEPTH_THRESHOLDS,
+    ))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+# 規則テーブルから自動で決まる（語彙・閾値を変えると、次回の実行で全チャンクが再分類される）
+RULES_VERSION = _rules_digest()
+
+
+def keyword_tags(text: str) -> set[str]:
+    """text に出現する語彙のタグ（カテゴリ名・構造タグ）を 1 回の走査で集める"""
+    found: set[str] = set()
+    for m in _KEYWORD_RE.finditer(text):
+        found |= _KEYWORD_TAGS[m.group(1)]
+    return found
+
+
+def depth_level(length: int) -> int:
+    for depth, limit in enumerate(DEPTH_THRESHOLDS):
+        if length < limit:
+            return depth
+    return len(DEPTH_THRESHOLDS)
+
+
+def classify_chunk(text: str) -> Tuple[str, int]:
+    t = (text or "").strip()
+    found = keyword_tags(t)
+
+    # 0) 構造・Q&A（最優先）
+    if _TAG_QNA in found or t.startswith(QNA_PREFIX):
+        category = "Q&A・記者質問"
+    elif SPEAKER_TAG_RE.fullmatch(t):
+        category = "構造・見出し"
+    elif _TAG_INTRO in found and _TAG_PRESS in found:
+        category = "Q&A・記者質問"
+    elif len(t) <= ACK_MAX_LEN and _TAG_ACK in found:
+        category = "構造・見出し"
     else:
-        category = "その他"
+        category = next((cat for cat, _ in KEYWORD_RULES if cat in found), "その他")
 
     # 深さ（最後に一度だけ）
-    length = len(t)
-    if length < 80:
-        depth = 0
-    elif length < 250:
-        depth = 1
-    elif length < 600:
-        depth = 2
+    return category, depth_level(len(t))
+
+def iter_metric_rows(terms: TermTable, rows: Iterable) -> Iterator[tuple]:
+    """chunks⋈speeches の行から chunk_metrics の行を 1 件ずつ生成する"""
+    for r in rows:
+        pm_term_id = r["pm_term_id"]
+        d_str = (r["dt"] or "")[:10]
+        if not d_str:
+            d_str = date.today().isoformat()
+
+        cat, depth = classify_chunk(r["chunk_text"])
+        phase = terms.origin_phase(pm_term_id, d_str)
+        yield (r["chunk_id"], pm_term_id, d_str, cat, depth, phase, RULES_VERSION)
+
+
+# ─────────────────────────────
+# 並列分類（--workers N）
+# ─────────────────────────────
+
+_worker_terms: Optional[TermTable] = None
+
+
+def _init_worker(terms: TermTable) -> None:
+    global _worker_terms
+    _worker_terms = terms
+
+
+def _classify_page(page: list[dict]) -> list[tuple]:
+    assert _worker_terms is not None
+    return list(iter_metric_rows(_worker_terms, page))
+
+
+def iter_parallel_metric_rows(
+    pages: Iterable[list], terms: TermTable, workers: int
+) -> Iterator[tuple]:
+    """
+    ページ単位でプロセスプールに分類させ、結果は読み出し順のまま 1 件ずつ返す。
+    先読みは workers * 2 ページまでなので、メモリはページ数分しか使わない。
+    """
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(terms,)
+    ) as ex:
+        pending: deque = deque()
+        for page in pages:
+            # sqlite3.Row は pickle できないので dict にして渡す
+            pending.append(ex.submit(_classify_page, [dict(r) for r in page]))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def refresh_origin_phases(conn, terms: TermTable, touched: Optional[set] = None) -> int:
+    """
+    既存行の origin_phase を、現在の pm_terms で計算し直す。
+    現任期は「今日」が任期末扱いで毎日動き、退任時には term_end_date が入るため、
+    再分類しない行も (任期, 日付) 単位でまとめて更新する。戻り値は更新行数。
+    touched を渡すと、値が変わった speech の id をそこに足す（speech_summary の更新用）。
+    """
+    updated = 0
+    for k in conn.execute(PHASE_KEYS_SQL).fetchall():
+        phase = terms.origin_phase(k["pm_term_id"], k["date"])
+        n = conn.execute(UPDATE_PHASE_SQL, (phase, k["pm_term_id"], k["date"], phase)).rowcount
+        if n > 0:
+            updated += n
+            if touched is not None:
+                touched.update(r[0] for r in conn.execute(PHASE_SPEECHES_SQL, (k["pm_term_id"], k["date"])))
+    return updated
+
+
+def refresh_speech_summaries(conn, speech_ids: Iterable[int]) -> int:
+    """指定 speech の speech_summary を作り直す。戻り値は作り直した speech 数"""
+    ids = [(sid,) for sid in sorted(set(speech_ids))]
+    conn.executemany(DELETE_SUMMARY_SQL, ids)
+    conn.executemany(INSERT_SUMMARY_SQL, [{"speech_id": sid} for sid, in ids])
+    return len(ids)
+
+
+def _cube_keys(conn, sql: str, speech_ids: list[int]) -> set[tuple[str, str]]:
+    return {(r["pm_term_id"], r["month"]) for sid in speech_ids for r in conn.execute(sql, (sid,))}
+
+
+def refresh_metrics_cube(conn, keys: Iterable[tuple[str, str]]) -> int:
+    """指定 (任期, 月) の metrics_cube を chunk_metrics から数え直す。戻り値は数え直したキー数"""
+    params = [{"pm_term_id": t, "month": m} for t, m in sorted(set(keys))]
+    conn.executemany(DELETE_CUBE_SQL, params)
+    conn.executemany(INSERT_CUBE_SQL, params)
+    return len(params)
+
+
+def refresh_aggregates(conn, speech_ids: Iterable[int]) -> Counter:
+    """
+    指定 speech の speech_summary と、その speech が載っていた / 載っている
+    (任期, 月) の metrics_cube を作り直す。
+    戻り値: Counter(summaries=作り直した speech 数, cube=数え直した (任期, 月) 数)
+    """
+    ids = sorted(set(speech_ids))
+    if conn.execute("SELECT 1 FROM metrics_cube LIMIT 1").fetchone() is None:
+        keys = {(r["pm_term_id"], r["month"]) for r in conn.execute(ALL_CUBE_KEYS_SQL)}
+    else:
+        # dt や任期が書き換わった・チャンクが消えた speech は、旧い (任期, 月) からも抜く
+        keys = _cube_keys(conn, SUMMARY_CUBE_KEYS_SQL, ids)
+        keys |= _cube_keys(conn, METRICS_CUBE_KEYS_SQL, ids)
+
+    stats: Counter = Counter()
+    stats["summaries"] = refresh_speech_summaries(conn, ids)
+    stats["cube"] = refresh_metrics_cube(conn, keys)
+    return stats
+
+
+def resolve_chunk_texts(conn, pages: Iterable[list]) -> Iterator[list]:
+    """
+    offsets-only のチャンク（text が ''）に、speech 本文の [char_start, char_end) を埋めて返す。
+    本文の展開はページ内で speech ごとに 1 回だけ。そういう行が無いページはそのまま流す。
+    """
+    for page in pages:
+        if not any(r["chunk_text"] == "" and r["char_end"] is not None for r in page):
+            yield page
+            continue
+        bodies: dict[int, str] = {}
+        out = []
+        for r in page:
+            r = dict(r)
+            if r["chunk_text"] == "" and r["char_end"] is not None:
+                sid = r["speech_id"]
+                if sid not in bodies:
+                    bodies[sid] = read_body(conn, sid) or ""
+                r["chunk_text"] = bodies[sid][r["char_start"]:r["char_end"]]
+            out.append(r)
+        yield out
+
+
+def _tracking_speeches(pages: Iterable[list], touched: set) -> Iterator[list]:
+    """読んだチャンクの speech id を touched に控えながらページをそのまま流す"""
+    for page in pages:
+        touched.update(r["speech_id"] for r in page)
+        yield page
+
+
+class MetricsWriter:
+    """
+    30_build_chunks.build_chunks(on_batch=...) に渡すと、投入されたばかりのチャンクを
+    読み直さずにその場で分類して chunk_metrics に書く。
+    """
+
+    def __init__(self, conn, terms: TermTable) -> None:
+        self.conn = conn
+        self.terms = terms
+        self.count = 0
+        self.speech_ids: set = set()   # build_metrics(touched=...) に渡して集約を更新する
+
+    def __call__(self, batch: list[dict]) -> None:
+        rows = list(iter_metric_rows(self.terms, batch))
+        self.conn.executemany(UPSERT_METRICS_SQL, rows)
+        self.count += len(rows)
+        self.speech_ids.update(r["speech_id"] for r in batch)
+
+
+def build_metrics(
+    conn,
+    rebuild: bool = False,
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    workers: int = 1,
+    terms: Optional[TermTable] = None,
+    touched: Optional[set] = None,
+) -> Counter:
+    """
+    分類ステージ本体。コミットはしない（呼び出し側のトランザクションにまとめる）。
+    touched には、ここより前にメトリクスを書いた speech の id を渡す（MetricsWriter.speech_ids）。
+    戻り値: Counter(metrics=分類した件数, phased=origin_phase だけ更新した件数,
+                    summaries=speech_summary を作り直した speech 数,
+                    cube=metrics_cube を数え直した (任期, 月) 数)
+    """
+    if conn.execute("SELECT 1 FROM chunks LIMIT 1").fetchone() is None:
+        raise SystemExit("ERROR: chunks is empty")
+
+    if rebuild:
+        if dry_run:
+            print("DRY-RUN: would delete chunk_metrics")
+        else:
+            conn.execute("DELETE FROM chunk_metrics;")
+            print("OK: cleared chunk_metrics")
+
+    # 未分類・規則が古い・speech の日付や任期が変わったチャンクだけを、chunk id 範囲で 1 ページずつ読む
+    touched = set(touched or ())
+    pages = _tracking_speeches(
+        resolve_chunk_texts(
+            conn,
+            iter_pages(
+                conn,
+                CHUNK_PAGE_SQL,
+                {"rules_version": RULES_VERSION},
+                key="chunk_id",
+                page_size=page_size,
+            ),
+        ),
+        touched,
+    )
+    terms = terms or TermTable.load(conn)
+    if workers > 1:
+        # 分類はワーカー、書き込みはこのプロセスだけ（読み出し順にコミット）
+        metrics = iter_parallel_metric_rows(pages, terms, workers)
+    else:
+        metrics = iter_metric_rows(terms, (r for page in pages for r in page))
+
+    stats: Counter = Counter()
+    if dry_run:
+        stats["metrics"] = sum(1 for _ in metrics)
     else:
-        depth = 3
+        stats["metrics"] = executemany_batched(conn, UPSERT_METRICS_SQL, metrics, batch_size, label="metrics")
+        stats["phased"] = refresh_origin_phases(conn, terms, touched)
+
+        touched.update(r[0] for r in conn.execute(ORPHAN_SUMMARIES_SQL))
+        touched.update(r[0] for r in conn.execute(STALE_SUMMARY_SQL))
+        stats.update(refresh_aggregates(conn, touched))
+    return stats
 
-    return category, depth
 
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--rebuild", action="store_true")
     ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    ap.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="chunks の読み出し単位")
+    ap.add_argument("--workers", type=int, default=1, help="分類を並列に行うプロセス数")
     args = ap.parse_args()
 
     with connect() as conn:
-        if args.rebuild:
-            if args.dry_run:
-                print("DRY-RUN: would delete chunk_metrics")
-            else:
-                conn.execute("DELETE FROM chunk_metrics;")
-                conn.commit()
-                print("OK: cleared chunk_metrics")
-
-        rows = conn.execute(
-            """
-            SELECT
-              c.id AS chunk_id,
-              c.text AS chunk_text,
-              s.pm_term_id AS pm_term_id,
-              s.dt AS dt
-            FROM chunks c
-            JOIN speeches s ON s.id = c.speech_id
-            ORDER BY c.id
-            """
-        ).fetchall()
-
-        if not rows:
-            raise SystemExit("ERROR: chunks is empty")
-
-        n = 0
-        for r in rows:
-            n += 1
-            pm_term_id = r["pm_term_id"]
-            d_str = (r["dt"] or "")[:10]
-            if not d_str:
-                d_str = date.today().isoformat()
-
-            cat, depth = classify_chunk(r["chunk_text"])
-            phase = calc_origin_phase(conn, pm_term_id, d_str)
-
-            if args.dry_run:
-                continue
-
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO chunk_metrics
-                (chunk_id, pm_term_id, date, category, depth_level, origin_phase)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (r["chunk_id"], pm_term_id, d_str, cat, depth, phase),
-            )
-
-        if not args.dry_run:
-            conn.commit()
-
-    print(f"OK: metrics built: {n} (dry_run={args.dry_run})")
+        stats = build_metrics(
+            conn,
+            rebuild=args.rebuild,
+            dry_run=args.dry_run,
+            batch_size=args.batch_size,
+            page_size=args.page_size,
+            workers=args.workers,
+        )
+        generation = get_generation(conn) if args.dry_run else bump_generation(conn)
+
+    print(
+        f"OK: metrics built: {stats['metrics']} (rules_version={RULES_VERSION},"
+        f" origin_phase updated={stats['phased']}, summaries={stats['summaries']},"
+        f" cube={stats['cube']}, generation={generation}, dry_run={args.dry_run})"
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
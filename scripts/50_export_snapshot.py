@@ -0,0 +1,95 @@
+# scripts/50_export_snapshot.py
+#
+# 分析用に、chunk_metrics⋈chunks⋈speeches を列指向のスナップショット（Arrow IPC ファイル）へ書き出す。
+# DB と同じ場所に <DB 名>.metrics.arrow を置く（pa.memory_map で開けばコピーせずに読める）。
+# category / pm_name / pm_term_id / date / title は辞書（pandas では categorical）、depth_level は int8。
+import argparse
+import os
+
+from scripts._db import connect, get_db_path
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow が無ければスナップショットは作らない
+    pa = None
+
+SNAPSHOT_SUFFIX = ".metrics.arrow"
+
+# chunk 1 行 = 1 行（並びは日付・origin_phase 順）
+SNAPSHOT_SQL = """
+SELECT
+    m.chunk_id,
+    m.pm_term_id,
+    m.date,
+    m.category,
+    m.depth_level,
+    m.origin_phase,
+    s.pm_name,
+    s.title
+FROM chunk_metrics AS m
+JOIN chunks AS c ON m.chunk_id = c.id
+JOIN speeches AS s ON c.speech_id = s.id
+ORDER BY m.date, m.origin_phase
+"""
+
+FETCH_SIZE = 10000
+
+DICTIONARY_COLUMNS = ("pm_term_id", "date", "category", "pm_name", "title")
+
+
+def snapshot_path(db_path: str) -> str:
+    """db/pm_speeches.db → db/pm_speeches.metrics.arrow"""
+    return os.path.splitext(db_path)[0] + SNAPSHOT_SUFFIX
+
+
+def _to_array(name: str, values: list):
+    if name in DICTIONARY_COLUMNS:
+        return pa.array(values, pa.string()).dictionary_encode()
+    if name == "chunk_id":
+        return pa.array(values, pa.int64())
+    if name == "depth_level":
+        return pa.array(values, pa.int8())
+    if name == "origin_phase":
+        return pa.array(values, pa.float32())
+    raise KeyError(name)
+
+
+def export_snapshot(conn, path: str) -> int:
+    """スナップショットを書き出して件数を返す。一時ファイルに書いてから置き換える"""
+    if pa is None:
+        raise SystemExit("ERROR: metrics snapshot requires pyarrow (pip install pyarrow)")
+
+    cur = conn.execute(SNAPSHOT_SQL)
+    names = [d[0] for d in cur.description]
+    columns: list[list] = [[] for _ in names]
+    while True:
+        rows = cur.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for col, values in zip(columns, zip(*rows)):
+            col.extend(values)
+
+    table = pa.table({name: _to_array(name, col) for name, col in zip(names, columns)})
+
+    # 非圧縮の IPC ファイル（読み手がそのまま memory-map できる）
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as f, pa.ipc.new_file(f, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    return table.num_rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default=None, help="出力先（既定: DB と同じ場所の <DB 名>.metrics.arrow）")
+    args = ap.parse_args()
+
+    path = args.out or snapshot_path(get_db_path())
+    with connect() as conn:
+        n = export_snapshot(conn, path)
+
+    print(f"OK: metrics snapshot: {n} rows -> {path} ({os.path.getsize(path) / 1024:,.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
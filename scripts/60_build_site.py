@@ -0,0 +1,416 @@
+# scripts/60_build_site.py
+#
+# proto_static の 面 / 線 / 点 を、DB 全体について静的サイトとして書き出す（CDN にそのまま置ける）。
+#   index.html              面: カテゴリ一覧（speech 数・チャンク数）と各カテゴリの線ページへのリンク
+#   line_<slug>.html        線: カテゴリ（speech_summary.category_mode）ごとの speech の時系列
+#   point_<speech_id>.html  点: speech の原文
+# 差分ビルド: ページごとに入力（speech の各列・本文の text_hash・一覧の中身・テンプレート）のハッシュを
+# <out>/.manifest.json に控え、入力が変わったページだけを描画する。描画結果が前回と同じならファイルも書かない。
+import argparse
+import hashlib
+import html
+import importlib
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from scripts._db import REPO_ROOT, body_hash, get_db_path, iter_pages, read_body, read_pool
+
+# 数字始まりのモジュール名は import 文で書けないので importlib で読む
+metrics = importlib.import_module("scripts.40_build_metrics")
+
+DEFAULT_OUT_DIR = REPO_ROOT / "site"
+STATIC_DIR = REPO_ROOT / "proto_static"
+STATIC_FILES = ("proto.css", "tokens.css")
+MANIFEST_NAME = ".manifest.json"
+
+# ワーカーに 1 回で渡すページ数
+RENDER_BATCH = 50
+
+SPEECH_PAGE_SQL = """
+SELECT
+  s.id AS speech_id,
+  s.dt,
+  s.pm_name,
+  COALESCE(s.title, '') AS title,
+  COALESCE(s.context, '') AS context,
+  COALESCE(s.source_url, '') AS source_url,
+  b.text_hash,
+  COALESCE(ss.category_mode, '') AS category_mode
+FROM speeches s
+LEFT JOIN speech_bodies b ON b.speech_id = s.id
+LEFT JOIN speech_summary ss ON ss.speech_id = s.id
+WHERE s.id > :after
+ORDER BY s.id
+LIMIT :limit
+"""
+
+LATEST_SPEECH_SQL = "SELECT id FROM speeches ORDER BY dt DESC, id DESC LIMIT 1"
+
+CATEGORY_CHUNKS_SQL = "SELECT category, SUM(n_chunks) AS n FROM metrics_cube GROUP BY category"
+
+# ─────────────────────────────
+# テンプレート（proto_static の手書きページと同じ構造）
+# ─────────────────────────────
+
+FOOTER = (
+    "本ツールは、政治家や政策を評価・断罪するためのものではありません。"
+    "国家の言葉を、時間と条件の中で静かに確認するための補助線です。"
+)
+
+PAGE_TEMPLATE = """<!doctype html><html lang="ja"><head>
+<meta charset="utf-8"/><meta name="viewport" content="width=device-width,initial-scale=1"/>
+<title>PoliticsRadar - {title}</title><link rel="stylesheet" href="./proto.css"/>
+</head><body><div class="wrap">
+  <div class="topbar">
+    <div class="badge">PoliticsRadar</div>
+    <div class="nav">
+      <a class="badge" href="./index.html">面</a>
+      <a class="badge" href="./{line_href}">線</a>
+      <a class="badge" href="./{point_href}">点</a>
+    </div>
+  </div>
+
+  <div class="card">
+{body}
+  </div>
+
+  <div class="footer">
+    {footer}
+  </div>
+</div></body></html>
+"""
+
+INDEX_BODY = """    <h1 class="h1">時間と条件の中に置き直す 官邸発信の配置</h1>
+    <p class="p">テーマごとに、官邸発信を時系列に並べています。並びはテーマの定義順で、件数の多寡や評価を示すものではありません。</p>
+    <div class="hr"></div>
+{items}"""
+
+INDEX_ITEM = """    <div class="item">
+      <div class="small">発言 {n_speeches} 件／チャンク {n_chunks} 件</div>
+      <div>{category}</div>
+      <div style="margin-top:8px"><a class="badge" href="./{href}">線ビューへ</a></div>
+    </div>
+"""
+
+LINE_BODY = """    <h1 class="h1">テーマ別に並べる 官邸発信の時系列配置（{category}）</h1>
+    <p class="p">単発ではなく、順序と間隔の中で確認します。重要度や評価順ではありません。</p>
+    <div class="hr"></div>
+{items}"""
+
+LINE_ITEM = """    <div class="item">
+      <div class="small">{date}</div>
+      <div>{title}</div>
+      <div style="margin-top:8px"><a class="badge" href="./{href}">原文（点）へ</a></div>
+    </div>
+"""
+
+POINT_BODY = """    <h1 class="h1">官邸発信 原文</h1>
+    <p class="p">要約・解説・強調を加えず、一次情報の原文に立ち返ります。解釈は固定しません。</p>
+    <div class="hr"></div>
+
+    <div class="item">
+      <div class="small">日付：{date}</div>
+      <div class="small">出典：{source}</div>
+      <div>{title}</div>
+{context}      <div class="hr"></div>
+      <div style="line-height:1.9">{text}</div>
+    </div>
+
+    <div style="margin-top:12px">
+      <a class="badge" href="./{line_href}">線へ戻る</a>
+      <a class="badge" href="./index.html">面へ戻る</a>
+    </div>"""
+
+
+def _template_digest() -> str:
+    payload = repr((PAGE_TEMPLATE, INDEX_BODY, INDEX_ITEM, LINE_BODY, LINE_ITEM, POINT_BODY, FOOTER))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+# テンプレートから自動で決まる（変えると、次回は全ページを描画し直す）
+TEMPLATE_VERSION = _template_digest()
+
+
+def category_slug(category: str) -> str:
+    return hashlib.sha1(category.encode("utf-8")).hexdigest()[:10]
+
+
+def line_href(category: str) -> str:
+    return f"line_{category_slug(category)}.html"
+
+
+def point_href(speech_id: int) -> str:
+    return f"point_{speech_id}.html"
+
+
+def split_categories(category_mode: str) -> list[str]:
+    """speech_summary.category_mode（同率は ' / ' で併記）→ カテゴリのリスト"""
+    return [c for c in category_mode.split(" / ") if c]
+
+
+# ─────────────────────────────
+# 描画（ワーカーでも動くよう、入力は素の dict / list だけ）
+# ─────────────────────────────
+
+def _e(s) -> str:
+    return html.escape(str(s or ""))
+
+
+def render_page(kind: str, data: dict) -> str:
+    if kind == "index":
+        title = "面"
+        body = INDEX_BODY.format(items="".join(
+            INDEX_ITEM.format(
+                category=_e(c["category"]), href=c["href"],
+                n_speeches=c["n_speeches"], n_chunks=c["n_chunks"],
+            )
+            for c in data["categories"]
+        ))
+    elif kind == "line":
+        title = f"線 {data['category']}"
+        body = LINE_BODY.format(category=_e(data["category"]), items="".join(
+            LINE_ITEM.format(date=_e(dt[:10]), title=_e(t) or "(no title)", href=point_href(sid))
+            for dt, sid, t in data["items"]
+        ))
+    elif kind == "point":
+        title = f"点 {data['dt'][:10]}"
+        url = data["source_url"]
+        source = f'<a href="{_e(url)}">首相官邸（原文URL）</a>' if url else "首相官邸"
+        context = f'      <div class="small">{_e(data["context"])}</div>\n' if data["context"] else ""
+        body = POINT_BODY.format(
+            date=_e(data["dt"][:10]), source=source, title=_e(data["title"]), context=context,
+            text=_e(data["text"]).replace("\n", "<br>\n"), line_href=data["line_href"],
+        )
+    else:
+        raise ValueError(f"unknown page kind: {kind}")
+
+    return PAGE_TEMPLATE.format(
+        title=_e(title), line_href=data["line_href"], point_href=data["point_href"],
+        body=body, footer=FOOTER,
+    )
+
+
+def _render_batch(jobs: list[tuple]) -> list[tuple]:
+    return [(rel, input_hash, render_page(kind, data)) for rel, input_hash, kind, data in jobs]
+
+
+def iter_rendered(jobs: Iterable[tuple], workers: int) -> Iterator[tuple]:
+    """
+    (rel, input_hash, kind, data) を描画して (rel, input_hash, html) を返す。
+    workers > 1 なら RENDER_BATCH 件ずつプロセスプールに渡す（先読みは workers * 2 バッチまで）。
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield from _render_batch([job])
+        return
+
+    batch: list = []
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        pending: deque = deque()
+        for job in jobs:
+            batch.append(job)
+            if len(batch) >= RENDER_BATCH:
+                pending.append(ex.submit(_render_batch, batch))
+                batch = []
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+        if batch:
+            pending.append(ex.submit(_render_batch, batch))
+        while pending:
+            yield from pending.popleft().result()
+
+
+# ─────────────────────────────
+# 差分判定と書き出し
+# ─────────────────────────────
+
+def input_hash(kind: str, data: dict) -> str:
+    payload = json.dumps([TEMPLATE_VERSION, kind, data], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(out_dir: Path) -> dict:
+    """{rel: {"input": 入力ハッシュ, "output": 出力ハッシュ}}（無い・壊れていれば空）"""
+    try:
+        with open(out_dir / MANIFEST_NAME, encoding="utf-8") as f:
+            return json.load(f).get("pages", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _sha1(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class SiteBuilder:
+    """
+    ページの入力を DB から順に読み、前回と入力が同じページは描画せずに飛ばす。
+    点ページの本文は、描画が要るページの分だけ展開する。
+    """
+
+    def __init__(self, conn, out_dir: Path, force: bool = False) -> None:
+        self.conn = conn
+        self.out_dir = out_dir
+        self.force = force
+        self.old = load_manifest(out_dir)
+        self.pages: dict[str, dict] = {}
+        self.stats: Counter = Counter()
+
+    def _fresh(self, rel: str, h: str) -> bool:
+        old = self.old.get(rel)
+        return (
+            not self.force
+            and old is not None
+            and old["input"] == h
+            and (self.out_dir / rel).exists()
+        )
+
+    def jobs(self) -> Iterator[tuple]:
+        """描画が要るページの (rel, input_hash, kind, data)"""
+        latest = self.conn.execute(LATEST_SPEECH_SQL).fetchone()
+        latest_href = point_href(latest[0]) if latest else "index.html"
+
+        # 点: speech ごと。線ページの中身もここで集める（speech_id と見出しだけなので小さい）
+        lines: dict[str, list] = {}
+        for page in iter_pages(self.conn, SPEECH_PAGE_SQL, key="speech_id"):
+            for r in page:
+                cats = split_categories(r["category_mode"])
+                for c in cats:
+                    lines.setdefault(c, []).append((r["dt"] or "", r["speech_id"], r["title"]))
+
+                text_hash = r["text_hash"]
+                if text_hash is None:  # まだ speech_bodies に移っていない本文
+                    text_hash = body_hash(read_body(self.conn, r["speech_id"]) or "")
+                data = {
+                    "speech_id": r["speech_id"],
+                    "dt": r["dt"] or "",
+                    "pm_name": r["pm_name"],
+                    "title": r["title"],
+                    "context": r["context"],
+                    "source_url": r["source_url"],
+                    "text_hash": text_hash,
+                    "line_href": line_href(cats[0]) if cats else "index.html",
+                    "point_href": point_href(r["speech_id"]),
+                }
+                job = self._job(point_href(r["speech_id"]), "point", data)
+                if job is not None:
+                    job[3]["text"] = read_body(self.conn, r["speech_id"]) or ""
+                    yield job
+
+        # 線: カテゴリごと。新しい順（dt → speech_id）
+        for category, items in lines.items():
+            items.sort(reverse=True)
+            data = {
+                "category": category,
+                "items": [list(i) for i in items],
+                "line_href": line_href(category),
+                "point_href": point_href(items[0][1]),
+            }
+            job = self._job(line_href(category), "line", data)
+            if job is not None:
+                yield job
+
+        # 面: カテゴリは 40_build_metrics の定義順（件数順にはしない）、定義外は名前順
+        n_chunks = {r["category"]: r["n"] for r in self.conn.execute(CATEGORY_CHUNKS_SQL)}
+        order = {c: i for i, c in enumerate(metrics.CATEGORIES)}
+        categories = sorted(lines, key=lambda c: (order.get(c, len(order)), c))
+        data = {
+            "categories": [
+                {
+                    "category": c,
+                    "href": line_href(c),
+                    "n_speeches": len(lines[c]),
+                    "n_chunks": n_chunks.get(c, 0),
+                }
+                for c in categories
+            ],
+            "line_href": line_href(categories[0]) if categories else "index.html",
+            "point_href": latest_href,
+        }
+        job = self._job("index.html", "index", data)
+        if job is not None:
+            yield job
+
+    def _job(self, rel: str, kind: str, data: dict) -> Optional[tuple]:
+        h = input_hash(kind, data)
+        if self._fresh(rel, h):
+            self.pages[rel] = self.old[rel]
+            self.stats["skipped"] += 1
+            return None
+        return rel, h, kind, data
+
+    def write(self, rel: str, h: str, page: str) -> None:
+        data = page.encode("utf-8")
+        out = _sha1(data)
+        self.pages[rel] = {"input": h, "output": out}
+        self.stats["rendered"] += 1
+        old = self.old.get(rel)
+        if old is not None and old.get("output") == out and (self.out_dir / rel).exists():
+            self.stats["unchanged"] += 1  # 入力は変わったが、出力は同じ
+            return
+        _write_atomic(self.out_dir / rel, data)
+        self.stats["written"] += 1
+
+    def finish(self) -> None:
+        """消えた speech / カテゴリのページを消し、静的ファイルと manifest を書く"""
+        for rel in self.old.keys() - self.pages.keys():
+            (self.out_dir / rel).unlink(missing_ok=True)
+            self.stats["removed"] += 1
+
+        for name in STATIC_FILES:
+            data = (STATIC_DIR / name).read_bytes()
+            dst = self.out_dir / name
+            if not dst.exists() or _sha1(dst.read_bytes()) != _sha1(data):
+                _write_atomic(dst, data)
+
+        manifest = {"template_version": TEMPLATE_VERSION, "pages": dict(sorted(self.pages.items()))}
+        _write_atomic(
+            self.out_dir / MANIFEST_NAME,
+            json.dumps(manifest, ensure_ascii=False, indent=0).encode("utf-8"),
+        )
+
+
+def build_site(conn, out_dir: Path, workers: int = 1, force: bool = False) -> Counter:
+    """
+    サイトを out_dir に書き出す。
+    戻り値: Counter(rendered=描画したページ数, written=書き込んだ数, unchanged=描画したが同じ内容だった数,
+                    skipped=入力が同じで描画しなかった数, removed=消したページ数)
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    builder = SiteBuilder(conn, out_dir, force=force)
+    for rel, h, page in iter_rendered(builder.jobs(), workers):
+        builder.write(rel, h, page)
+    builder.finish()
+    return builder.stats
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default=str(DEFAULT_OUT_DIR), help="出力先ディレクトリ（既定: site/）")
+    ap.add_argument("--workers", type=int, default=1, help="描画を並列に行うプロセス数")
+    ap.add_argument("--force", action="store_true", help="manifest を無視して全ページを描画し直す")
+    args = ap.parse_args()
+
+    out_dir = Path(args.out)
+    with read_pool(get_db_path()).connection() as conn:
+        stats = build_site(conn, out_dir, workers=args.workers, force=args.force)
+
+    print(
+        f"OK: site built: {out_dir} (rendered={stats['rendered']}, written={stats['written']},"
+        f" unchanged={stats['unchanged']}, skipped={stats['skipped']}, removed={stats['removed']},"
+        f" template_version={TEMPLATE_VERSION})"
+    )
+
+
+if __name__ == "__main__":
+    main()
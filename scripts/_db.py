@@ -1,18 +1,49 @@
 # scripts/_db.py
 from __future__ import annotations
 
+import hashlib
 import os
+import queue
 import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional, Sequence, TypeVar
 
 from dotenv import load_dotenv
 
+try:
+    import zstandard
+except ImportError:  # zstd は任意（無ければ zlib だけで読み書きする）
+    zstandard = None
+
 REPO_ROOT = Path(__file__).resolve().parents[1]  # politics_radar/
 load_dotenv(dotenv_path=REPO_ROOT / ".env")      # ★探索しない
 
 DEFAULT_DB_REL = REPO_ROOT / "db" / "pm_speeches.db"
 
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_PAGE_SIZE = 500
+
+T = TypeVar("T")
+
+# 接続ごとに当てる PRAGMA（journal_mode=WAL は DB ファイルに永続化される）
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",      # WAL 下ではこれで十分（コミット毎の fsync を省く）
+    "PRAGMA busy_timeout=5000",       # ダッシュボード読み出しと重なっても即エラーにしない
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",       # 64 MiB
+)
+
+# speech 本文の圧縮形式（speech_bodies.codec）。書き込みはこれ、読み出しは行ごとの codec に従う
+BODY_CODEC = os.environ.get("POLR_BODY_CODEC", "zlib")
+BODY_ZLIB_LEVEL = 6
+BODY_ZSTD_LEVEL = 10
+
 def get_db_path() -> str:
     p = os.environ.get("POLR_DB_PATH")
     if p:
@@ -33,4 +64,300 @@ def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
     ensure_parent_dir(path)
     conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
-    return conn
\ No newline at end of file
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    register_functions(conn)
+    return conn
+
+# ─────────────────────────────
+# 読み出し専用の接続プール（ダッシュボード用）
+#   mode=ro で開くので、パイプラインが WAL で書いている間も並行して読める（書き込み側を止めない）。
+#   immutable=True は書き手がいない DB（配布用のコピーなど）専用: ロックも変更検知もしなくなる。
+#   接続はプロセス内で使い回し、スレッドをまたいで貸し出す（Streamlit のセッションごとのスレッド）。
+# ─────────────────────────────
+
+READ_POOL_SIZE = 8
+
+READ_PRAGMAS = (
+    "PRAGMA query_only=ON",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16384",       # 16 MiB（接続ごと）
+)
+
+
+class ReadPool:
+    """1 つの DB への読み出し専用接続を最大 size 本まで手元に置いて使い回す"""
+
+    def __init__(self, db_path: str, immutable: bool = False, size: int = READ_POOL_SIZE) -> None:
+        self.db_path = db_path
+        self.immutable = immutable
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+
+    def _open(self) -> sqlite3.Connection:
+        uri = Path(self.db_path).expanduser().resolve().as_uri() + "?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in READ_PRAGMAS:
+            conn.execute(pragma)
+        register_functions(conn)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """with pool.connection() as conn: 抜けるときに（読み取りトランザクションを閉じて）返す"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_read_pools: dict[tuple[str, bool], ReadPool] = {}
+_read_pools_lock = threading.Lock()
+
+
+def read_pool(db_path: Optional[str] = None, immutable: Optional[bool] = None) -> ReadPool:
+    """
+    db_path（既定は get_db_path()）の読み出し専用プール。プロセス内で 1 つだけ作る。
+    immutable を省くと環境変数 POLR_DB_IMMUTABLE=1 のときだけ immutable で開く。
+    """
+    path = str(Path(db_path or get_db_path()).expanduser().resolve())
+    if immutable is None:
+        immutable = os.environ.get("POLR_DB_IMMUTABLE") == "1"
+    with _read_pools_lock:
+        pool = _read_pools.get((path, immutable))
+        if pool is None:
+            pool = _read_pools[(path, immutable)] = ReadPool(path, immutable)
+        return pool
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    it = iter(items)
+    while True:
+        batch = list(islice(it, max(1, size)))
+        if not batch:
+            return
+        yield batch
+
+def executemany_batched(
+    conn: sqlite3.Connection,
+    sql: str,
+    rows: Iterable[Sequence | Mapping[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    label: str = "rows",
+    on_batch: Optional[Callable[[list], None]] = None,
+) -> int:
+    """
+    rows を batch_size 件ずつ executemany し、進捗と rows/s を表示する。
+    on_batch があれば、各バッチを書き込んだ直後にそのバッチを渡す。
+    コミットはしない（呼び出し側のトランザクションにまとめる）。
+    """
+    t0 = time.perf_counter()
+    n = 0
+    for batch in batched(rows, batch_size):
+        conn.executemany(sql, batch)
+        if on_batch is not None:
+            on_batch(batch)
+        n += len(batch)
+        print(f"  {label}: {n} ...", end="\r", flush=True)
+    elapsed = time.perf_counter() - t0
+    rate = n / elapsed if elapsed > 0 else 0.0
+    print(f"  {label}: {n} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+    return n
+
+def iter_pages(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: Optional[Mapping[str, Any]] = None,
+    key: str = "id",
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[list[sqlite3.Row]]:
+    """
+    rowid の範囲で区切って 1 ページずつ読む（keyset ページング）。
+    sql は `key > :after` を満たす行を `ORDER BY key LIMIT :limit` で返すこと。
+    例: SELECT id, raw_text FROM speeches WHERE id > :after ORDER BY id LIMIT :limit
+    """
+    after = -(2 ** 63)
+    while True:
+        page = conn.execute(sql, {**(params or {}), "after": after, "limit": page_size}).fetchall()
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after = page[-1][key]
+
+def iter_rows(
+    conn: sqlite3.Connection,
+    sql: str,
+    params: Optional[Mapping[str, Any]] = None,
+    key: str = "id",
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> Iterator[sqlite3.Row]:
+    """iter_pages を 1 行ずつに平らにしたもの（同時に保持するのは 1 ページ分だけ）"""
+    for page in iter_pages(conn, sql, params, key, page_size):
+        yield from page
+
+def next_rowid(conn: sqlite3.Connection, table: str) -> int:
+    """
+    AUTOINCREMENT 表で次に払い出される id（削除済み id は再利用しない）。
+    書き込みが 1 本だけのバッチ投入で、id を自前で採番するときに使う。
+    """
+    row = conn.execute(
+        f"""
+        SELECT MAX(n) FROM (
+          SELECT MAX(id) AS n FROM {table}
+          UNION ALL
+          SELECT seq FROM sqlite_sequence WHERE name = ?
+        )
+        """,
+        (table,),
+    ).fetchone()
+    return (row[0] or 0) + 1
+
+# ─────────────────────────────
+# DB の世代（meta 表の generation）
+#   パイプラインがビルドを書き込むたびに同じトランザクションで 1 つ進める。
+#   ダッシュボードはこれをキャッシュのキーに含め、ビルド後は自然に読み直す。
+# ─────────────────────────────
+
+GENERATION_KEY = "generation"
+
+BUMP_GENERATION_SQL = """
+INSERT INTO meta (key, value) VALUES (:key, '1')
+ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+"""
+
+
+def get_generation(conn: sqlite3.Connection) -> int:
+    """現在の世代（meta 表が無い・まだ一度もビルドしていない DB は 0）"""
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (GENERATION_KEY,)).fetchone()
+    except sqlite3.OperationalError:  # 10_init_db 前の DB
+        return 0
+    return int(row[0]) if row else 0
+
+
+def bump_generation(conn: sqlite3.Connection) -> int:
+    """世代を 1 つ進めて新しい値を返す。コミットは呼び出し側（ビルドと同じトランザクションで）"""
+    conn.execute(BUMP_GENERATION_SQL, {"key": GENERATION_KEY})
+    return get_generation(conn)
+
+# ─────────────────────────────
+# speech 本文（speech_bodies に圧縮して持つ）
+#   speeches への INSERT は従来どおり raw_text を直接入れてよい。
+#   move_bodies が speech_bodies に移し、raw_text を NULL・char_count を埋める
+#   （10_init_db の移行と 20_stream_ingest が呼ぶ）。読むときは raw_text → 本文表の順。
+# ─────────────────────────────
+
+READ_BODY_SQL = """
+SELECT s.raw_text, b.codec, b.body
+FROM speeches s
+LEFT JOIN speech_bodies b ON b.speech_id = s.id
+WHERE s.id = ?
+"""
+
+INLINE_BODIES_SQL = """
+SELECT id, raw_text FROM speeches
+WHERE raw_text IS NOT NULL AND id > :after
+ORDER BY id
+LIMIT :limit
+"""
+
+UPSERT_BODY_SQL = """
+INSERT OR REPLACE INTO speech_bodies (speech_id, codec, text_hash, body)
+VALUES (?, ?, ?, ?)
+"""
+
+MOVE_BODY_SQL = "UPDATE speeches SET raw_text = NULL, char_count = ? WHERE id = ?"
+
+def body_hash(text: str) -> str:
+    """本文の sha1（speech_bodies.text_hash / chunk_builds.text_hash）"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def encode_body(text: str, codec: Optional[str] = None) -> tuple[str, bytes]:
+    codec = codec or BODY_CODEC
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise SystemExit("ERROR: POLR_BODY_CODEC=zstd requires zstandard (pip install zstandard)")
+        return codec, zstandard.ZstdCompressor(level=BODY_ZSTD_LEVEL).compress(data)
+    if codec == "zlib":
+        return codec, zlib.compress(data, BODY_ZLIB_LEVEL)
+    raise ValueError(f"unknown body codec: {codec}")
+
+def decode_body(codec: Optional[str], body: Optional[bytes]) -> Optional[str]:
+    if body is None:
+        return None
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("speech body is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(body).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(body).decode("utf-8")
+    raise ValueError(f"unknown body codec: {codec}")
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    """SQL から本文を読む speech_body(codec, body)（speech_texts ビューが使う。トリガからは呼ばない）"""
+    conn.create_function("speech_body", 2, decode_body, deterministic=True)
+
+def read_body(conn: sqlite3.Connection, speech_id: int) -> Optional[str]:
+    """1 speech の本文（speech が無ければ None）"""
+    row = conn.execute(READ_BODY_SQL, (speech_id,)).fetchone()
+    if row is None:
+        return None
+    if row[0] is not None:
+        return row[0]
+    return decode_body(row[1], row[2]) or ""
+
+def move_bodies(
+    conn: sqlite3.Connection,
+    speech_ids: Optional[Iterable[int]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> int:
+    """
+    speeches.raw_text に直接入っている本文を speech_bodies へ移す（speech_ids 省略時は全件）。
+    戻り値は移した件数。コミットはしない。
+    """
+    if speech_ids is None:
+        pages: Iterable = iter_pages(conn, INLINE_BODIES_SQL, page_size=page_size)
+    else:
+        ids = list(speech_ids)
+        pages = (
+            conn.execute(
+                f"SELECT id, raw_text FROM speeches WHERE raw_text IS NOT NULL AND id IN ({','.join('?' * len(b))})",
+                b,
+            ).fetchall()
+            for b in batched(ids, page_size)
+        )
+
+    n = 0
+    for page in pages:
+        # 本文 → speeches の順に書く（raw_text を NULL にするだけの更新は、本文が移し終わったものとして索引し直さない）
+        conn.executemany(
+            UPSERT_BODY_SQL,
+            [(r["id"], *_encoded(r["raw_text"])) for r in page],
+        )
+        conn.executemany(MOVE_BODY_SQL, [(len(r["raw_text"]), r["id"]) for r in page])
+        n += len(page)
+    return n
+
+def _encoded(text: str) -> tuple[str, str, bytes]:
+    codec, body = encode_body(text)
+    return codec, body_hash(text), body
@@ -0,0 +1,254 @@
+# scripts/_fts.py
+#
+# speeches の全文検索（10_init_db が作る speech_fts = FTS5 trigram）。
+# コーパスをメモリに載せず、ヒットした speech の id と、ヒット位置を含むチャンクの
+# raw_text 上の位置 [char_start, char_end) を返す。
+# trigram は 3 文字未満の語を引けないので、2 文字以下の語は speech_bigrams（bigram の索引）で引く。
+# どちらの索引も平文を持たない（contentless）。トリガが speech_fts_pending に積んだ speech を
+# refresh_fts がまとめて索引し直し、それまでの間だけ、その speech は本文を展開して LIKE で見る。
+from __future__ import annotations
+
+import argparse
+import bisect
+import re
+import sqlite3
+from typing import Iterable, Optional
+
+from scripts._db import connect, decode_body, read_body
+
+MIN_TRIGRAM_LEN = 3
+
+# bigram に切る単位（英数字・かな・漢字の並び。unicode61 が区切りとみなす文字で切る）
+WORD_RE = re.compile(r"[^\W_]+")
+
+PENDING_PAGE_SQL = """
+SELECT speech_id, indexed, title, context, raw_text, codec, body
+FROM speech_fts_pending
+ORDER BY speech_id
+LIMIT ?
+"""
+
+# 今の値（本文は speech_texts ビューが speech_body() で展開する）
+CURRENT_TEXT_SQL = "SELECT title, context, raw_text FROM speech_texts WHERE id = ?"
+
+FTS_INSERT_SQL = "INSERT INTO speech_fts (rowid, title, context, raw_text) VALUES (?, ?, ?, ?)"
+FTS_DELETE_SQL = "INSERT INTO speech_fts (speech_fts, rowid, title, context, raw_text) VALUES ('delete', ?, ?, ?, ?)"
+BIGRAM_INSERT_SQL = "INSERT INTO speech_bigrams (rowid, grams) VALUES (?, ?)"
+BIGRAM_DELETE_SQL = "INSERT INTO speech_bigrams (speech_bigrams, rowid, grams) VALUES ('delete', ?, ?)"
+
+SEARCH_IDS_SQL = """
+SELECT s.id
+FROM speeches s
+WHERE {where}
+ORDER BY s.dt DESC, s.id DESC
+LIMIT :limit
+"""
+
+CHUNK_SPANS_SQL = """
+SELECT id, order_in_speech, char_start, char_end
+FROM chunks
+WHERE speech_id = ? AND char_end IS NOT NULL
+ORDER BY char_start
+"""
+
+
+def split_terms(q: str) -> list[str]:
+    """空白区切りの語（AND 検索）"""
+    return [t for t in (q or "").split() if t]
+
+
+def fts_available(conn: sqlite3.Connection) -> bool:
+    n = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('speech_fts', 'speech_bigrams')"
+    ).fetchone()[0]
+    return n == 2
+
+
+def fts_match(terms: Iterable[str]) -> str:
+    """語ごとにフレーズとして引用し AND でつなぐ（FTS5 の構文文字をそのまま検索できるように）"""
+    return " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def bigram_match(terms: Iterable[str]) -> str:
+    """speech_bigrams 用: 2 文字の語はその bigram、1 文字の語はそれで始まる bigram（前方一致）"""
+    return " AND ".join('"' + t.replace('"', '""') + '"' + ("*" if len(t) == 1 else "") for t in terms)
+
+
+def bigram_text(*texts: Optional[str]) -> str:
+    """
+    speech_bigrams.grams: 語（WORD_RE の並び）ごとの 2 文字の並びと、語の末尾の 1 文字。
+    2 文字の語は bigram に一致し、1 文字の語は「その文字で始まる bigram / 末尾の 1 文字」の前方一致で必ず拾える。
+    並びや回数は使わないので重複は落とす。
+    """
+    grams: set[str] = set()
+    for text in texts:
+        for w in WORD_RE.findall(text or ""):
+            grams.update(w[i:i + 2] for i in range(len(w) - 1))
+            grams.add(w[-1])
+    return " ".join(sorted(grams))
+
+
+def _bigram_indexable(t: str) -> bool:
+    # 記号を含む語は unicode61 が区切ってしまうので bigram では引けない
+    return len(t) < MIN_TRIGRAM_LEN and WORD_RE.fullmatch(t) is not None
+
+
+def refresh_fts(conn: sqlite3.Connection, page_size: int = 500) -> int:
+    """
+    speech_fts_pending に積まれた speech を speech_fts / speech_bigrams に索引し直す。戻り値は処理した speech 数。
+    索引は値を持たないので、抜くときは pending に写してある「索引したときの値」を渡す。コミットは呼び出し側。
+    """
+    if not fts_available(conn):
+        return 0
+    done = 0
+    while True:
+        page = conn.execute(PENDING_PAGE_SQL, (page_size,)).fetchall()
+        if not page:
+            return done
+        for p in page:
+            sid = p["speech_id"]
+            if p["indexed"]:
+                raw = p["raw_text"] if p["raw_text"] is not None else decode_body(p["codec"], p["body"])
+                conn.execute(FTS_DELETE_SQL, (sid, p["title"], p["context"], raw))
+                conn.execute(BIGRAM_DELETE_SQL, (sid, bigram_text(p["title"], p["context"], raw)))
+            row = conn.execute(CURRENT_TEXT_SQL, (sid,)).fetchone()
+            if row is not None:  # 消えた speech は索引から抜くだけ
+                conn.execute(FTS_INSERT_SQL, (sid, row["title"], row["context"], row["raw_text"]))
+                conn.execute(BIGRAM_INSERT_SQL, (sid, bigram_text(*row)))
+        conn.executemany("DELETE FROM speech_fts_pending WHERE speech_id = ?", [(p["speech_id"],) for p in page])
+        done += len(page)
+
+
+def _like_escape(t: str) -> str:
+    return "%" + t.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def _like_where(table: str, id_expr: str, id_column: str, terms: list[str], params: dict, start: int) -> list[str]:
+    """terms の各語を title / context / raw_text のどれかに含む、を表す EXISTS 句（語ごと）"""
+    where = []
+    for i, t in enumerate(terms, start):
+        params[f"fts_t{i}"] = _like_escape(t)
+        cols = " OR ".join(
+            f"COALESCE(x.{c}, '') LIKE :fts_t{i} ESCAPE '\\'" for c in ("title", "context", "raw_text")
+        )
+        where.append(f"EXISTS (SELECT 1 FROM {table} x WHERE x.{id_expr} = {id_column} AND ({cols}))")
+    return where
+
+
+def speech_filter(conn: sqlite3.Connection, q: str, id_column: str = "s.id") -> tuple[str, dict]:
+    """
+    「id_column の speech が全ての語を含む」を表す WHERE 句の断片と、そのパラメータ。
+    他のクエリ（線ビューのページングなど）にそのまま埋め込める。語が無ければ常に真。
+    """
+    terms = split_terms(q)
+    if not terms:
+        return "1", {}
+
+    params: dict = {}
+    like_all = " AND ".join(_like_where("speech_texts", "id", id_column, terms, params, 0))
+    if not fts_available(conn):
+        # 索引が無い（trigram の無い SQLite）: 本文は speech_bodies 側なので speech_texts ビュー越しに走査する
+        return like_all, params
+
+    long_terms = [t for t in terms if len(t) >= MIN_TRIGRAM_LEN]
+    short_terms = [t for t in terms if _bigram_indexable(t)]
+    other_terms = [t for t in terms if len(t) < MIN_TRIGRAM_LEN and not _bigram_indexable(t)]
+    # 記号を含む短い語は索引で引けない: 語に含まれる英数字・かな・漢字で bigram 索引から候補を絞り、
+    # 候補だけ本文を展開して LIKE で確かめる（記号だけの語は全 speech を展開する）
+    gram_terms = short_terms + [w for t in other_terms for w in WORD_RE.findall(t)]
+
+    indexed = []
+    if long_terms:
+        indexed.append(f"{id_column} IN (SELECT rowid FROM speech_fts WHERE speech_fts MATCH :fts_match)")
+        params["fts_match"] = fts_match(long_terms)
+    if gram_terms:
+        indexed.append(f"{id_column} IN (SELECT rowid FROM speech_bigrams WHERE speech_bigrams MATCH :fts_bigrams)")
+        params["fts_bigrams"] = bigram_match(gram_terms)
+    indexed.extend(_like_where("speech_texts", "id", id_column, other_terms, params, len(terms)))
+
+    # 索引し直し待ちの speech は、索引の代わりに本文を展開して LIKE で見る
+    pending = f"{id_column} IN (SELECT speech_id FROM speech_fts_pending)"
+    return f"((NOT {pending} AND {' AND '.join(indexed)}) OR ({pending} AND {like_all}))", params
+
+
+def search_speech_ids(conn: sqlite3.Connection, q: str, limit: int = -1) -> list[int]:
+    """title / context / raw_text に全ての語を含む speech の id（新しい順）"""
+    if not split_terms(q):
+        return []
+    where, params = speech_filter(conn, q)
+    rows = conn.execute(SEARCH_IDS_SQL.format(where=where), dict(params, limit=limit))
+    return [r[0] for r in rows]
+
+
+def find_hits(text: str, terms: Iterable[str]) -> list[tuple[int, int]]:
+    """text 上の各語の出現位置 [start, end)（trigram と同じく大文字小文字は区別しない）"""
+    pat = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    return [m.span() for m in pat.finditer(text)]
+
+
+def search_chunks(
+    conn: sqlite3.Connection,
+    q: str,
+    limit: int = 50,
+    speech_ids: Optional[list[int]] = None,
+) -> list[dict]:
+    """
+    本文中のヒットを、それを含むチャンク単位で返す。
+    行: speech_id / chunk_id / order_in_speech / char_start / char_end / hits（チャンク内のヒット位置）
+    位置はすべて speeches.raw_text 上の文字オフセット。speech は新しい順に最大 limit 本。
+    """
+    terms = split_terms(q)
+    if not terms:
+        return []
+    if speech_ids is None:
+        speech_ids = search_speech_ids(conn, q, limit)
+
+    out: list[dict] = []
+    for sid in speech_ids[:limit] if limit >= 0 else speech_ids:
+        raw = read_body(conn, sid)
+        if raw is None:
+            continue
+        hits = find_hits(raw, terms)
+        if not hits:
+            continue  # title / context だけに当たった
+
+        spans = conn.execute(CHUNK_SPANS_SQL, (sid,)).fetchall()
+        starts = [c["char_start"] for c in spans]
+        by_chunk: dict[int, dict] = {}
+        for start, end in hits:
+            i = bisect.bisect_right(starts, start) - 1
+            if i < 0 or start >= spans[i]["char_end"]:
+                continue  # ノイズとして落とされた行の中
+            c = spans[i]
+            hit = by_chunk.setdefault(c["id"], {
+                "speech_id": sid,
+                "chunk_id": c["id"],
+                "order_in_speech": c["order_in_speech"],
+                "char_start": c["char_start"],
+                "char_end": c["char_end"],
+                "hits": [],
+            })
+            hit["hits"].append((start, end))
+        out.extend(by_chunk.values())
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="speeches の全文検索（speech_fts）")
+    ap.add_argument("query")
+    ap.add_argument("--limit", type=int, default=20, help="speech の最大件数")
+    args = ap.parse_args()
+
+    with connect() as conn:
+        ids = search_speech_ids(conn, args.query, args.limit)
+        chunks = search_chunks(conn, args.query, args.limit, speech_ids=ids)
+
+    print(f"OK: {len(ids)} speeches, {len(chunks)} chunks")
+    for c in chunks:
+        spans = ", ".join(f"{s}-{e}" for s, e in c["hits"])
+        print(f"  speech={c['speech_id']} chunk#{c['order_in_speech']}"
+              f" [{c['char_start']}, {c['char_end']}) hits: {spans}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# scripts/bench_extract.py
+#
+# 本文抽出（kantei_scraper.EXTRACTORS）の速度と出力の一致を比べる。
+# 入力はキャッシュ済みの官邸ページ（既定）か、--html-dir 配下の *.html。
+# ネットワークには出ない。
+#
+# 照合の基準は legacy（本文コンテナ導入前の、ページ全体の get_text）:
+#   - 本文コンテナが無いページ: legacy と同じ文字列でなければならない
+#   - 本文コンテナがあるページ: タイトルが同じで、本文の各行が legacy の本文に同じ順で現れること
+#     （コンテナの外のナビゲーション等が落ちるぶんだけ短くなる）
+# 守れていないページがあれば終了コード 1 で終わる。
+import argparse
+import glob
+import os
+import time
+
+from scripts import kantei_scraper as ks
+
+BASELINE = "legacy"
+
+
+def iter_html_dir(path: str):
+    for fn in sorted(glob.glob(os.path.join(path, "*.html"))):
+        with open(fn, "rb") as f:
+            body = f.read()
+        yield fn, body.decode(ks.response_encoding("", body), errors="replace")
+
+
+def is_narrowed(out: tuple[str, str], base: tuple[str, str]) -> bool:
+    """out の本文の各行が base の本文に同じ順で現れる（タイトルは同じ）"""
+    if out[0] != base[0]:
+        return False
+    lines = iter(base[1].splitlines())
+    return all(line in lines for line in out[1].splitlines())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cache-dir", default=ks.CACHE_DIR)
+    ap.add_argument("--html-dir", default=None, help="キャッシュの代わりにこのディレクトリの *.html を使う")
+    ap.add_argument("--repeat", type=int, default=3, help="各ページを何回抽出して最短を取るか")
+    args = ap.parse_args()
+
+    if args.html_dir:
+        pages = list(iter_html_dir(args.html_dir))
+    else:
+        pages = list(ks.ResponseCache(args.cache_dir).iter_pages())
+    if not pages:
+        raise SystemExit("ERROR: no pages (run kantei_scraper once to fill the cache, or pass --html-dir)")
+
+    names = [BASELINE] + [n for n in ks.EXTRACTORS if n != BASELINE and (n != "lxml" or ks.lxml_html is not None)]
+    results: dict[str, list] = {}
+    for name in names:
+        extract = ks.EXTRACTORS[name]
+        outs, total = [], 0.0
+        for _, html in pages:
+            best = None
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                out = extract(html)
+                sec = time.perf_counter() - t0
+                best = sec if best is None else min(best, sec)
+            outs.append(out)
+            total += best
+        results[name] = outs
+        print(f"{name:<6} pages={len(pages)} total={total:.3f}s per_page={total / len(pages) * 1000:.2f}ms")
+
+    containers = [ks.body_container(html) for _, html in pages]
+    print(f"body container found in {sum(c is not None for c in containers)}/{len(pages)} pages")
+
+    failed = 0
+    base = results[BASELINE]
+    for name in names[1:]:
+        identical = narrowed = 0
+        bad = []
+        for (url, _), container, out, ref in zip(pages, containers, results[name], base):
+            if out == ref:
+                identical += 1
+            elif container is not None and is_narrowed(out, ref):
+                narrowed += 1
+            else:
+                bad.append((url, container))
+        print(f"{BASELINE} vs {name}: identical={identical} narrowed={narrowed} different={len(bad)}")
+        for url, container in bad[:10]:
+            print(f"  DIFF {url} (container={container or '-'})")
+        failed += len(bad)
+
+    # 新しい実装どうしは、コンテナの有無にかかわらず同じ文字列を返す
+    if len(names) > 2:
+        first, *others = names[1:]
+        for name in others:
+            diff = [url for (url, _), a, b in zip(pages, results[first], results[name]) if a != b]
+            print(f"{first} vs {name}: identical={len(pages) - len(diff)} different={len(diff)}")
+            for url in diff[:10]:
+                print(f"  DIFF {url}")
+            failed += len(diff)
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
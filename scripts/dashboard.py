@@ -1,5 +1,5 @@
 # scripts/dashboard.py
-import sqlite3
+import sys
 import pandas as pd
 import streamlit as st
 import os
@@ -7,55 +7,69 @@ import os
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 DB_PATH = os.path.join(BASE_DIR, "db", "pm_speeches.db")
 
+# streamlit run scripts/dashboard.py でも scripts._db を import できるようにする
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
 
-@st.cache_data
-def load_metrics() -> pd.DataFrame:
-    conn = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query("""
-        SELECT
-            m.chunk_id,
-            m.pm_term_id,
-            m.date,
-            m.category,
-            m.depth_level,
-            m.origin_phase,
-            s.pm_name,
-            s.title
-        FROM chunk_metrics AS m
-        JOIN chunks AS c ON m.chunk_id = c.id
-        JOIN speeches AS s ON c.speech_id = s.id
-        ORDER BY m.date, m.origin_phase;
-    """, conn)
-    conn.close()
+from scripts._db import get_generation, read_pool  # noqa: E402
+
+# キャッシュはビルドの世代ごと。世代が進めば次の再描画で読み直し、古い世代の分は押し出される
+CACHE_MAX_ENTRIES = 4
+CACHE_TTL_SECONDS = 3600   # 世代を進めない書き込み（手作業のスクリプトなど）の保険
+
+
+def db_generation() -> int:
+    # キャッシュしない（meta 表の 1 行を引くだけ）
+    with read_pool(DB_PATH).connection() as conn:
+        return get_generation(conn)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def load_counts(generation: int) -> pd.DataFrame:
+    # 40_build_metrics が保守する metrics_cube（任期 × 月 × カテゴリ × 深さの件数）だけを読む。
+    # 行数はチャンク数ではなく カテゴリ数 × 深さ × 任期 × 月 で頭打ちになる
+    # （generation はキャッシュのキーとしてだけ使う）
+    # 読み出し専用のプール接続（パイプラインの書き込み中でも待たずに読める）
+    with read_pool(DB_PATH).connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT
+                COALESCE(t.pm_name, c.pm_term_id) AS pm_name,
+                c.depth_level,
+                c.category,
+                SUM(c.n_chunks) AS count
+            FROM metrics_cube AS c
+            LEFT JOIN pm_terms AS t ON t.pm_term_id = c.pm_term_id
+            GROUP BY 1, 2, 3;
+        """, conn)
     return df
 
 
 def main() -> None:
     st.title("首相発言ラダー：分析ダッシュボード（MVP）")
 
-    df = load_metrics()
+    counts = load_counts(db_generation())
 
     # 絞り込み
-    pm_names = ["すべて"] + sorted(df["pm_name"].unique().tolist())
+    pm_names = ["すべて"] + sorted(counts["pm_name"].unique().tolist())
     selected_pm = st.selectbox("首相を選択", pm_names)
     if selected_pm != "すべて":
-        df = df[df["pm_name"] == selected_pm]
+        counts = counts[counts["pm_name"] == selected_pm]
 
     st.subheader("カテゴリ別 発言チャンク数")
-    cat_counts = df.groupby("category")["chunk_id"].count().reset_index(name="count")
+    cat_counts = counts.groupby("category")["count"].sum().reset_index(name="count")
     st.bar_chart(cat_counts.set_index("category"))
 
     st.subheader("origin_phase × depth_level の分布（表）")
     pivot = pd.pivot_table(
-        df,
-        values="chunk_id",
+        counts,
+        values="count",
         index="depth_level",
         columns="category",
-        aggfunc="count",
+        aggfunc="sum",
         fill_value=0,
     )
     st.dataframe(pivot)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,14 +1,29 @@
 # scripts/kantei_scraper.py
 
+import argparse
+import hashlib
+import json
 import os
 import sys
 import re
 import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Callable, Iterator, Optional
 from urllib.parse import urljoin, urlparse
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # lxml が無ければ bs4 (html.parser) だけで動く
+    lxml_html = None
 
 # ─────────────────────────────
 # three_codes ディレクトリを import パスに追加
@@ -19,9 +34,9 @@ THREE_CODES_DIR = os.path.join(BASE_DIR, "three_codes")
 if THREE_CODES_DIR not in sys.path:
     sys.path.append(THREE_CODES_DIR)
 
-# ここから three_codes 内のモジュールを「単体」で import
-from pm_rag_init import upsert_pm_term, insert_speech, insert_chunk
-from pm_rag_metrics import insert_chunk_metrics
+# three_codes 内のモジュール（pm_rag_init / pm_rag_metrics）は、それを使う
+# insert_fetched_speech（従来の 1 本ずつ投入する経路）の中でだけ import する。
+# 20_stream_ingest・bench_extract など、この経路を通らない使い方は three_codes 無しで動く
 
 # ─────────────────────────────
 # 定数・メタデータ
@@ -34,6 +49,252 @@ PM_NAME = "高市 早苗"
 TERM_START_DATE = "2025-10-21"  # 高市内閣発足日（例）
 TERM_NOTE = "第104代内閣総理大臣 第1次内閣"
 
+# URL の /jp/10x/ 部分 → 任期メタデータ
+# 過去内閣をバックフィルするときは、ここに任期を足してから --list-url で一覧を渡す
+PM_TERMS: dict[str, dict[str, Optional[str]]] = {
+    "104": {
+        "pm_term_id": PM_TERM_ID,
+        "pm_name": PM_NAME,
+        "term_start_date": TERM_START_DATE,
+        "term_end_date": None,
+        "note": TERM_NOTE,
+    },
+}
+
+USER_AGENT = "politics_radar/kantei_scraper"
+DEFAULT_WORKERS = 1          # 1 = 従来どおりの逐次取得
+DEFAULT_PER_HOST = 2         # 同一ホストへの同時接続数の上限
+DEFAULT_DELAY_SEC = 1.0      # 同一ホストへのリクエスト開始間隔（礼儀ディレイ）
+
+CACHE_DIR = os.path.join(BASE_DIR, "cache", "kantei")
+
+SPEECH_CONTEXT = "演説・記者会見（自動取得）"
+
+TITLE_FALLBACK = "首相演説（タイトル取得失敗）"
+
+# 本文を含む要素の候補 (タグ, id)。上から順に最初に見つかったものだけをテキスト化し、
+# どれも無ければページ全体を使う（従来どおり）
+BODY_CONTAINERS: list[tuple[str, Optional[str]]] = [
+    ("main", None),
+    ("article", None),
+    ("div", "contents"),
+]
+
+# テキストとして数えない要素（bs4 の get_text が数えない文字列の入れ物と同じ。
+# ルビの読み・括弧も落とす。noscript の中身は従来どおり本文に含める）
+SKIP_TEXT_TAGS = {"script", "style", "template", "rt", "rp"}
+
+# html.parser（bs4）は空白だけのテキストノードを、改行を含めば "\n"、含まなければ " " 1 つに縮める。
+# 縮めないのはこれらの要素の中だけ。空白は ASCII の空白だけを数える（全角スペース・&nbsp; は縮めない）
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+ASCII_SPACES = " \n\t\x0c\r"
+
+# lxml（libxml2）は改行の \r\n・\r を \n にそろえてしまうが、html.parser はテキストの \r をそのまま残す
+# （タイトルは整形しないので残ったまま出る）。テキスト中（次の山括弧が '<'）の \r だけ文字参照にして、
+# lxml にもそのまま読ませる。タグの中（属性の区切りの改行など）は触らない
+CR_IN_TEXT_RE = re.compile(r"\r(?=[^<>]*(?:<|$))")
+
+# 旧い XHTML ページ先頭の XML 宣言（lxml は encoding 付きの宣言を含む str を受け付けない）
+XML_DECL_RE = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+
+# ─────────────────────────────
+# HTTP 取得（接続プール + ホスト単位の流量制御）
+# ─────────────────────────────
+
+class HostThrottle:
+    """ホストごとに同時接続数を制限し、リクエスト開始の間隔を delay_sec 以上あける"""
+
+    def __init__(self, per_host: int, delay_sec: float) -> None:
+        self.per_host = max(1, per_host)
+        self.delay_sec = max(0.0, delay_sec)
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    def _slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._slots.get(host)
+            if sem is None:
+                sem = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return sem
+
+    def _reserve_start(self, host: str) -> float:
+        """次の開始時刻を予約し、それまで待つ秒数を返す"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.delay_sec
+            return start - now
+
+    @contextmanager
+    def hold(self, url: str) -> Iterator[None]:
+        host = urlparse(url).netloc
+        with self._slot(host):
+            wait = self._reserve_start(host)
+            if wait > 0:
+                time.sleep(wait)
+            yield
+
+
+class CacheMiss(requests.RequestException):
+    """オフライン再生時に、キャッシュに無いURLを要求された"""
+
+
+class ResponseCache:
+    """
+    URL をキーにしたオンディスクのレスポンスキャッシュ。
+    本文（bytes）と、ETag / Last-Modified / 文字コードを 1URL 2ファイルで保存する。
+    """
+
+    def __init__(self, root: str = CACHE_DIR) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, url: str, ext: str) -> str:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, f"{key}.{ext}")
+
+    def load(self, url: str) -> Optional[tuple[bytes, dict]]:
+        try:
+            with open(self._path(url, "json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._path(url, "body"), "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return body, meta
+
+    def store(self, url: str, body: bytes, meta: dict) -> None:
+        # 本文 → メタの順に置き換える（メタがあれば本文は必ず揃っている）
+        self._replace(self._path(url, "body"), body)
+        meta = dict(meta, url=url, fetched_at=datetime.now().isoformat(timespec="seconds"))
+        self._replace(self._path(url, "json"), json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    def iter_pages(self) -> Iterator[tuple[str, str]]:
+        """キャッシュ済みの (URL, デコード済み HTML) を全て返す（ベンチマーク・再抽出用）"""
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                    url = json.load(f)["url"]
+            except (OSError, ValueError, KeyError):
+                continue
+            hit = self.load(url)
+            if hit is not None:
+                yield url, _decode_cached(*hit)
+
+    @staticmethod
+    def _replace(path: str, data: bytes) -> None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+
+def _decode_cached(body: bytes, meta: dict) -> str:
+    return body.decode(meta.get("encoding") or "utf-8", errors="replace")
+
+
+def response_encoding(content_type: str, body: bytes) -> str:
+    """
+    文字コードを Content-Type の charset → <meta charset> → utf-8 の順で決める。
+    本文全体を走査する文字コード推定（apparent_encoding）はしない。
+    """
+    m = CHARSET_RE.search(content_type or "")
+    if m:
+        return m.group(1)
+    m = META_CHARSET_RE.search(body[:4096])
+    if m:
+        return m.group(1).decode("ascii")
+    return "utf-8"
+
+
+class Crawler:
+    """
+    接続プール付きの requests.Session を 1 つ共有して取得する。
+    workers=1 のときは従来の逐次取得と同じ順序で動く。
+
+    cache を渡すと条件付き GET（If-None-Match / If-Modified-Since）になり、
+    offline=True ならネットワークに一切出ずキャッシュだけを返す。
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        per_host: int = DEFAULT_PER_HOST,
+        delay_sec: float = DEFAULT_DELAY_SEC,
+        cache: Optional[ResponseCache] = None,
+        offline: bool = False,
+    ) -> None:
+        if offline and cache is None:
+            raise ValueError("offline mode requires a cache")
+        self.workers = max(1, workers)
+        self.throttle = HostThrottle(per_host, delay_sec)
+        self.cache = cache
+        self.offline = offline
+        self.stats: Counter[str] = Counter()
+        self._stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_maxsize=max(self.workers, self.throttle.per_host))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def get_text(self, url: str, timeout: float) -> str:
+        cached = self.cache.load(url) if self.cache else None
+
+        if self.offline:
+            if cached is None:
+                raise CacheMiss(f"not in cache: {url}")
+            self._count("offline")
+            return _decode_cached(*cached)
+
+        headers: dict[str, str] = {}
+        if cached:
+            meta = cached[1]
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        with self.throttle.hold(url):
+            resp = self.session.get(url, timeout=timeout, headers=headers)
+
+        if resp.status_code == 304 and cached:
+            self._count("not_modified")
+            return _decode_cached(*cached)
+
+        resp.raise_for_status()
+        resp.encoding = response_encoding(resp.headers.get("Content-Type", ""), resp.content)
+        self._count("fetched")
+
+        if self.cache:
+            self.cache.store(url, resp.content, {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "encoding": resp.encoding,
+            })
+        return resp.text
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "Crawler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
 
 # ─────────────────────────────
 # テキスト整形
@@ -80,6 +341,113 @@ def extract_body_from_statement_page(full_text: str) -> str:
     return normalize_text(body)
 
 
+# ─────────────────────────────
+# HTML → (タイトル, 本文)
+#   extract_with_bs4  : 純 Python の html.parser（lxml が無い環境向け）
+#   extract_with_lxml : lxml（C 実装）。既定はこちらが使えればこちら
+#   どちらも「最初の h1 をタイトル、本文コンテナのテキストノードを改行で連結」で、
+#   同じページからは同じ文字列を返す（tests/test_extract_parity.py・scripts/bench_extract.py で照合）
+# ─────────────────────────────
+
+Extractor = Callable[[str], tuple[str, str]]
+
+
+class ExtractError(Exception):
+    """取得はできたが本文を抽出できなかったページ（クロールはその URL だけ飛ばして続ける）"""
+
+def extract_with_bs4(html: str) -> tuple[str, str]:
+    soup = BeautifulSoup(html, "html.parser")
+
+    h1 = soup.find("h1")
+    title = h1.get_text(strip=True) if h1 else TITLE_FALLBACK
+
+    root = soup
+    for tag, id_ in BODY_CONTAINERS:
+        found = soup.find(tag, id=id_) if id_ else soup.find(tag)
+        if found is not None:
+            root = found
+            break
+
+    # 従来の soup.get_text("\n") と同じ（コメント・script・ルビの読みなどは含まない）
+    return title, extract_body_from_statement_page(root.get_text("\n"))
+
+
+def _bs4_string(s: str, preserve: bool) -> str:
+    """html.parser が木に入れる形の文字列（空白だけのノードは 1 文字に縮める）"""
+    if preserve or s.strip(ASCII_SPACES):
+        return s
+    return "\n" if "\n" in s else " "
+
+
+def _lxml_texts(el, preserve: bool = False) -> Iterator[str]:
+    """bs4 の get_text と同じ順序・粒度・空白でテキストノードを返す（el 自身の tail は含めない）"""
+    # コメント等（tag が str でない）と SKIP_TEXT_TAGS の中身（子孫ごと）は読まない
+    if not isinstance(el.tag, str) or el.tag in SKIP_TEXT_TAGS:
+        return
+    inner = preserve or el.tag in PRESERVE_WHITESPACE_TAGS
+    if el.text:
+        yield _bs4_string(el.text, inner)
+    for child in el:
+        yield from _lxml_texts(child, inner)
+        if child.tail:
+            yield _bs4_string(child.tail, inner)
+
+
+def extract_with_lxml(html: str) -> tuple[str, str]:
+    if lxml_html is None:
+        raise RuntimeError("lxml is not installed")
+    # html.parser では XML 宣言は処理命令としてテキストに入らないので、落としても出力は変わらない
+    html = XML_DECL_RE.sub("", html, count=1)
+    if "\r" in html:
+        html = CR_IN_TEXT_RE.sub("&#13;", html)
+    doc = lxml_html.document_fromstring(html)
+
+    h1 = doc.find(".//h1")
+    # bs4 の get_text(strip=True) と同じく、テキストノードごとに strip して連結
+    title = "".join(t.strip() for t in _lxml_texts(h1)) if h1 is not None else TITLE_FALLBACK
+
+    root = doc
+    for tag, id_ in BODY_CONTAINERS:
+        found = doc.find(f".//{tag}[@id='{id_}']" if id_ else f".//{tag}")
+        if found is not None:
+            root = found
+            break
+
+    return title, extract_body_from_statement_page("\n".join(_lxml_texts(root)))
+
+
+def extract_legacy(html: str) -> tuple[str, str]:
+    """本文コンテナを導入する前の抽出（ページ全体の get_text）。scripts/bench_extract.py の比較基準"""
+    soup = BeautifulSoup(html, "html.parser")
+    h1 = soup.find("h1")
+    title = h1.get_text(strip=True) if h1 else TITLE_FALLBACK
+    return title, extract_body_from_statement_page(soup.get_text("\n"))
+
+
+def body_container(html: str) -> Optional[str]:
+    """html で最初に見つかる BODY_CONTAINERS の要素（'div#contents' など。無ければ None）"""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag, id_ in BODY_CONTAINERS:
+        if (soup.find(tag, id=id_) if id_ else soup.find(tag)) is not None:
+            return f"{tag}#{id_}" if id_ else tag
+    return None
+
+
+EXTRACTORS: dict[str, Extractor] = {
+    "bs4": extract_with_bs4,
+    "lxml": extract_with_lxml,
+    "legacy": extract_legacy,
+}
+
+
+def get_extractor(name: str = "auto") -> Extractor:
+    if name == "auto":
+        name = "lxml" if lxml_html is not None else "bs4"
+    if name == "lxml" and lxml_html is None:
+        raise SystemExit("ERROR: --extractor lxml requires lxml (pip install lxml)")
+    return EXTRACTORS[name]
+
+
 # ─────────────────────────────
 # DB 既存チェック
 # ─────────────────────────────
@@ -105,20 +473,42 @@ def speech_exists(source_url: str) -> bool:
     return row is not None
 
 
+def load_known_urls(db_path: Optional[str] = None) -> set[str]:
+    """登録済み speech の source_url を 1 回のクエリでまとめて読む"""
+    db_path = db_path or get_db_path()
+    if not os.path.exists(db_path):
+        return set()
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT source_url FROM speeches WHERE source_url IS NOT NULL"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # speeches 未作成（init_db 前）なら全件が新規
+        return set()
+    finally:
+        conn.close()
+    return {r[0] for r in rows}
+
+
 # ─────────────────────────────
 # 官邸一覧ページから対象URLを拾う
 # ─────────────────────────────
 
-def find_statement_urls(limit: int = 10) -> list[tuple[str, str]]:
+def find_statement_urls(
+    limit: int = 10,
+    list_url: str = STATEMENT_LIST_URL,
+    crawler: Optional[Crawler] = None,
+) -> list[tuple[str, str]]:
     """
     statement/index.html から
     「所信表明演説」など首相発言らしいリンクを複数件拾う（最大 limit 件）。
     戻り値: [(タイトル, URL), ...]
     """
-    resp = requests.get(STATEMENT_LIST_URL, timeout=10)
-    resp.encoding = resp.apparent_encoding
+    crawler = crawler or Crawler()
+    html = crawler.get_text(list_url, timeout=10)
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
 
     items: list[tuple[str, str]] = []
 
@@ -126,7 +516,7 @@ def find_statement_urls(limit: int = 10) -> list[tuple[str, str]]:
         text = a.get_text(strip=True)
         # ★ フィルタ条件はあとでいくらでも調整できます
         if ("所信表明演説" in text) or ("内閣総理大臣" in text) or ("記者会見" in text):
-            url = urljoin(STATEMENT_LIST_URL, a["href"])
+            url = urljoin(list_url, a["href"])
             items.append((text, url))
 
     # URL 重複を除去しつつ、先頭から limit 件だけ返す
@@ -182,49 +572,58 @@ def parse_datetime_from_url(url: str) -> str:
         return datetime.now().strftime("%Y-%m-%d 00:00")
 
 
-def fetch_and_insert_speech(url: str) -> None:
-    """指定URLの演説ページを取得し、DB に 1チャンクとして登録する"""
+def term_for_url(url: str) -> Optional[dict[str, Optional[str]]]:
+    """URL の /jp/10x/ から任期メタデータを引く（未登録なら None）"""
+    m = re.search(r"/jp/(\d+)/", urlparse(url).path)
+    return PM_TERMS.get(m.group(1)) if m else None
 
-    if speech_exists(url):
-        print(f"[SKIP] 既に登録済みのようです: {url}")
-        return
+
+def fetch_speech(url: str, crawler: Crawler, extract: Optional[Extractor] = None) -> dict[str, str]:
+    """
+    指定URLの演説ページを取得して本文を抜き出す。
+    ワーカースレッドから呼ばれるので、DB には触らない。
+    """
 
     # 1. ページ取得
-    resp = requests.get(url, timeout=15)
-    resp.encoding = resp.apparent_encoding
-    soup = BeautifulSoup(resp.text, "html.parser")
+    html = crawler.get_text(url, timeout=15)
 
-    # 2. タイトル
-    h1 = soup.find("h1")
-    if h1:
-        title = h1.get_text(strip=True)
-    else:
-        # 取得できなければ適当なフォールバック
-        title = "首相演説（タイトル取得失敗）"
+    # 2. タイトル・本文コンテナから本文を抽出
+    try:
+        title, body_text = (extract or get_extractor())(html)
+    except Exception as e:  # パーサが受け付けないページ（壊れた HTML など）
+        raise ExtractError(f"{type(e).__name__}: {e}") from e
+
+    return {"url": url, "title": title, "body_text": body_text}
+
+
+def insert_fetched_speech(doc: dict[str, str]) -> None:
+    """fetch_speech の結果を DB に 1チャンクとして登録する（呼び出し元スレッドで逐次実行）"""
+    # three_codes 内のモジュールを「単体」で import
+    from pm_rag_init import upsert_pm_term, insert_speech, insert_chunk
+    from pm_rag_metrics import insert_chunk_metrics
 
-    # 3. ページ全体テキストから本文を抽出
-    full_text = soup.get_text("\n")
-    body_text = extract_body_from_statement_page(full_text)
+    url = doc["url"]
+    body_text = doc["body_text"]
+    term = term_for_url(url) or PM_TERMS["104"]
 
     # 4. 任期情報（まだなければ upsert）
     upsert_pm_term(
-        pm_term_id=PM_TERM_ID,
-        pm_name=PM_NAME,
-        term_start_date=TERM_START_DATE,
-        term_end_date=None,
-        note=TERM_NOTE,
+        pm_term_id=term["pm_term_id"],
+        pm_name=term["pm_name"],
+        term_start_date=term["term_start_date"],
+        term_end_date=term["term_end_date"],
+        note=term["note"],
     )
 
     # 5. speeches へ INSERT
     speech_datetime = parse_datetime_from_url(url)
-    context = "演説・記者会見（自動取得）"
 
     speech_id = insert_speech(
-        pm_term_id=PM_TERM_ID,
-        pm_name=PM_NAME,
+        pm_term_id=term["pm_term_id"],
+        pm_name=term["pm_name"],
         dt_iso=speech_datetime,
-        title=title,
-        context=context,
+        title=doc["title"],
+        context=SPEECH_CONTEXT,
         raw_text=body_text,
         source_url=url,
     )
@@ -245,20 +644,132 @@ def fetch_and_insert_speech(url: str) -> None:
     print("   chunk_id :", chunk_id)
 
 
+def fetch_and_insert_speech(
+    url: str, crawler: Optional[Crawler] = None, extract: Optional[Extractor] = None
+) -> None:
+    """指定URLの演説ページを取得し、DB に 1チャンクとして登録する"""
+
+    if speech_exists(url):
+        print(f"[SKIP] 既に登録済みのようです: {url}")
+        return
+
+    insert_fetched_speech(fetch_speech(url, crawler or Crawler(), extract))
+
+
+# ─────────────────────────────
+# クローラ（一覧 → 詳細の並列取得）
+# ─────────────────────────────
+
+def collect_candidates(
+    list_urls: list[str],
+    limit: int,
+    crawler: Crawler,
+    known: set[str],
+) -> list[tuple[str, str]]:
+    """一覧ページ群から候補URLを集め、未登録内閣・登録済みURLを HTTP を出す前に除外する"""
+    items: list[tuple[str, str]] = []
+    seen: set[str] = set()
+    for list_url in list_urls:
+        for title, url in find_statement_urls(limit=limit, list_url=list_url, crawler=crawler):
+            if url in seen:
+                continue
+            seen.add(url)
+            if term_for_url(url) is None:
+                print(f"[SKIP] 任期情報が未登録の内閣です: {url}")
+                continue
+            if url in known:
+                print(f"[SKIP] 既に登録済みのようです: {url}")
+                continue
+            items.append((title, url))
+    return items
+
+
+def iter_fetched(
+    items: list[tuple[str, str]], crawler: Crawler, extract: Optional[Extractor] = None
+) -> Iterator[dict[str, str]]:
+    """詳細ページを crawler.workers 本で並列取得し、取得できたものから順に返す"""
+    extract = extract or get_extractor()
+    with ThreadPoolExecutor(max_workers=crawler.workers) as ex:
+        futures = {ex.submit(fetch_speech, url, crawler, extract): (title, url) for title, url in items}
+        for fut in as_completed(futures):
+            title, url = futures[fut]
+            print("\n---")
+            print("タイトル:", title)
+            print("URL    :", url)
+            try:
+                yield fut.result()
+            except requests.RequestException as e:
+                print(f"[ERROR] 取得に失敗しました: {url} ({e})")
+            except ExtractError as e:
+                print(f"[ERROR] 本文の抽出に失敗しました: {url} ({e})")
+
+
+def crawl(
+    list_urls: list[str], limit: int, crawler: Crawler, extract: Optional[Extractor] = None
+) -> None:
+    """
+    一覧ページ群から候補URLを集め、詳細ページを crawler.workers 本で並列取得する。
+    登録済みURLは最初に 1 クエリで読み、HTTP を出す前にまとめて除外する。
+    DB への投入は取得完了順に、このスレッドで 1 件ずつ行う。
+    """
+    items = collect_candidates(list_urls, limit, crawler, load_known_urls())
+    for doc in iter_fetched(items, crawler, extract):
+        insert_fetched_speech(doc)
+
+
+def add_crawler_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--list-url", action="append", default=None,
+                    help="一覧ページURL（複数指定可。既定は現内閣の statement/index.html）")
+    ap.add_argument("--limit", type=int, default=10, help="一覧ページごとの最大件数")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    ap.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    ap.add_argument("--delay", type=float, default=DEFAULT_DELAY_SEC)
+    ap.add_argument("--cache-dir", default=CACHE_DIR)
+    ap.add_argument("--no-cache", action="store_true", help="レスポンスキャッシュを使わない")
+    ap.add_argument("--offline", action="store_true",
+                    help="ネットワークに出ず、キャッシュ済みのページだけで再生する")
+    ap.add_argument("--extractor", choices=["auto", *EXTRACTORS], default="auto",
+                    help="本文抽出の実装（auto = lxml があれば lxml）")
+
+
+def crawler_from_args(args: argparse.Namespace) -> Crawler:
+    if args.offline and args.no_cache:
+        raise SystemExit("ERROR: --offline requires the cache (drop --no-cache)")
+    cache = None if args.no_cache else ResponseCache(args.cache_dir)
+    return Crawler(
+        workers=args.workers,
+        per_host=args.per_host,
+        delay_sec=args.delay,
+        cache=cache,
+        offline=args.offline,
+    )
+
+
+def print_http_stats(crawler: Crawler) -> None:
+    stats = crawler.stats
+    print(
+        f"\nHTTP: fetched={stats['fetched']} not_modified={stats['not_modified']}"
+        f" offline={stats['offline']}"
+    )
+
+
 # ─────────────────────────────
 # エントリーポイント
 # ─────────────────────────────
 
 def main() -> None:
+    ap = argparse.ArgumentParser()
+    add_crawler_args(ap)
+    args = ap.parse_args()
+
+    crawler = crawler_from_args(args)
+
     print("=== 官邸サイトから首相発言を複数取得します ===")
 
-    items = find_statement_urls(limit=10)
+    with crawler:
+        crawl(args.list_url or [STATEMENT_LIST_URL], args.limit, crawler, get_extractor(args.extractor))
 
-    for title, url in items:
-        print("\n---")
-        print("タイトル:", title)
-        print("URL    :", url)
-        fetch_and_insert_speech(url)
+    print_http_stats(crawler)
 
 
 if __name__ == "__main__":
@@ -1,17 +1,97 @@
 # scripts/run_pipeline.py
-import subprocess, sys
+import argparse
+import importlib
+import time
+from contextlib import contextmanager
+
+from scripts import doctor_env
+from scripts._db import DEFAULT_BATCH_SIZE, bump_generation, connect, get_db_path
+
+# 数字始まりのモジュール名は import 文で書けないので importlib で読む
+init_db = importlib.import_module("scripts.10_init_db")
+chunks = importlib.import_module("scripts.30_build_chunks")
+metrics = importlib.import_module("scripts.40_build_metrics")
+snapshot = importlib.import_module("scripts.50_export_snapshot")
+
+
+@contextmanager
+def stage(name: str, timings: list):
+    print(f"\n== {name}")
+    t0 = time.perf_counter()
+    yield
+    timings.append((name, time.perf_counter() - t0))
 
-def run(cmd):
-    print("\n$ " + " ".join(cmd))
-    r = subprocess.run(cmd)
-    if r.returncode != 0:
-        raise SystemExit(r.returncode)
 
 def main():
-    run([sys.executable, "-m", "scripts.doctor_env"])
-    run([sys.executable, "-m", "scripts.10_init_db"])
-    run([sys.executable, "-m", "scripts.30_build_chunks", "--rebuild"])
-    run([sys.executable, "-m", "scripts.40_build_metrics", "--rebuild"])
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rebuild", action="store_true", help="差分ではなくチャンク・メトリクスを全て作り直す")
+    chunks.add_splitter_args(ap)
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    ap.add_argument(
+        "--workers", type=int, default=1,
+        help="分類のプロセス数。1 なら新しいチャンクは 30 の投入と同時にこのプロセスで分類する。"
+             "2 以上ならその場では分類せず、新しいチャンクも含めて 40 で N プロセスに分けて分類する",
+    )
+    ap.add_argument("--snapshot", action="store_true", help="分析用の列指向スナップショットも書き出す（要 pyarrow）")
+    args = ap.parse_args()
+
+    timings: list = []
+    with stage("doctor_env", timings):
+        doctor_env.main()
+
+    # 以降は 1 接続・1 トランザクション（途中で落ちればまとめて巻き戻る）
+    with connect() as conn:
+        with stage("10_init_db", timings):
+            init_db.init_db(conn)
+
+        # --workers 1: 新しく切ったチャンクは読み直さず、バッチごとにそのまま分類して書く。
+        # --workers N: 1 プロセスで分類してしまわないよう、ここでは投入だけにして 40 のプロセスプールに回す
+        terms = metrics.TermTable.load(conn)
+        writer = metrics.MetricsWriter(conn, terms) if args.workers <= 1 else None
+        with stage("30_build_chunks" + (" (+ streamed metrics)" if writer else ""), timings):
+            c_stats = chunks.build_chunks(
+                conn,
+                max_len=args.max_len,
+                rebuild=args.rebuild,
+                batch_size=args.batch_size,
+                on_batch=writer,
+                splitter=args.splitter,
+                store_text=not args.offsets_only,
+            )
+
+        # 残り（規則バージョンが古い既存チャンク。--workers N なら新しいチャンクも）と origin_phase の更新
+        with stage("40_build_metrics", timings):
+            m_stats = metrics.build_metrics(
+                conn,
+                batch_size=args.batch_size,
+                workers=args.workers,
+                terms=terms,
+                touched=writer.speech_ids if writer else None,
+            )
+
+        with stage("commit", timings):
+            generation = bump_generation(conn)
+            conn.commit()
+
+        # コミット済みの内容から、pandas / pyarrow で memory-map して読める列指向スナップショットを作る
+        n_snapshot = None
+        if args.snapshot and snapshot.pa is None:
+            print("\nSKIP: 50_export_snapshot (pyarrow is not installed)")
+        elif args.snapshot:
+            with stage("50_export_snapshot", timings):
+                n_snapshot = snapshot.export_snapshot(conn, snapshot.snapshot_path(get_db_path()))
+
+    print(
+        f"\nOK: chunks={c_stats['chunks']} (speeches changed={c_stats['changed']},"
+        f" unchanged={c_stats['unchanged']}),"
+        f" metrics={writer.count if writer else 0} streamed + {m_stats['metrics']} in 40 (workers={args.workers}),"
+        f" origin_phase updated={m_stats['phased']}, summaries={m_stats['summaries']},"
+        f" cube={m_stats['cube']},"
+        f" snapshot={'-' if n_snapshot is None else n_snapshot}, generation={generation}"
+    )
+    for name, sec in timings:
+        print(f"  {name:<40} {sec:8.2f}s")
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -20,12 +20,21 @@ from __future__ import annotations
 
 import os
 import sqlite3
+import sys
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, ContextManager, Dict, Optional, Tuple
 
 import pandas as pd
 import streamlit as st
 
+# scripts/ の共通モジュール（全文検索）を使うためにリポジトリ直下を import パスに足す
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from scripts._db import get_generation, read_body, read_pool  # noqa: E402
+from scripts._fts import search_chunks, speech_filter  # noqa: E402
+
 
 # -------------------------
 # Config
@@ -38,10 +47,20 @@ def resolve_db_path() -> str:
     return str(Path("db") / "pm_speeches.db")
 
 
-def connect(db_path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Cached queries take the DB generation (meta.generation, bumped by every pipeline build)
+# as part of their key, so a build is picked up on the next rerun without clearing caches.
+# Entries are bounded (many filter / page combinations) and expire anyway, to cover
+# writes that do not bump the generation (e.g. ad-hoc scripts).
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL_SECONDS = 3600
+
+
+def connect(db_path: str) -> ContextManager[sqlite3.Connection]:
+    # Borrow a pooled read-only connection (mode=ro, query_only, speech_body() registered;
+    # see scripts/_db.py). Sessions share the pool instead of opening one per query,
+    # and reads do not block or get blocked by a pipeline writing in WAL mode.
+    # Set POLR_DB_IMMUTABLE=1 when serving a DB copy that nothing writes to.
+    return read_pool(db_path).connection()
 
 
 def file_mtime_iso(path: str) -> str:
@@ -57,8 +76,14 @@ def file_mtime_iso(path: str) -> str:
 # Queries
 # -------------------------
 
-@st.cache_data(show_spinner=False)
-def fetch_pm_names(db_path: str) -> list[str]:
+def fetch_generation(db_path: str) -> int:
+    """Not cached: one indexed lookup per rerun."""
+    with connect(db_path) as conn:
+        return get_generation(conn)
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def fetch_pm_names(db_path: str, generation: int) -> list[str]:
     with connect(db_path) as conn:
         rows = conn.execute(
             "SELECT DISTINCT pm_name FROM speeches ORDER BY pm_name"
@@ -66,8 +91,8 @@ def fetch_pm_names(db_path: str) -> list[str]:
     return [r["pm_name"] for r in rows]
 
 
-@st.cache_data(show_spinner=False)
-def fetch_dt_range(db_path: str) -> Tuple[Optional[str], Optional[str], int]:
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def fetch_dt_range(db_path: str, generation: int) -> Tuple[Optional[str], Optional[str], int]:
     with connect(db_path) as conn:
         row = conn.execute(
             "SELECT MIN(dt) AS min_dt, MAX(dt) AS max_dt, COUNT(*) AS n FROM speeches"
@@ -77,109 +102,104 @@ def fetch_dt_range(db_path: str) -> Tuple[Optional[str], Optional[str], int]:
     return row["min_dt"], row["max_dt"], row["n"]
 
 
-@st.cache_data(show_spinner=False)
-def fetch_line_list(
+LINE_PAGE_SIZES = [25, 50, 100]
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def fetch_line_page(
     db_path: str,
+    generation: int,
     pm_name: Optional[str],
     from_dt: Optional[str],
     to_dt: Optional[str],
-) -> pd.DataFrame:
+    q: str,
+    ascending: bool,
+    after: Optional[Tuple[str, int]],
+    page_size: int,
+) -> Tuple[pd.DataFrame, Optional[Tuple[str, int]]]:
     """
-    Line (timeline) list:
+    Line (timeline) list, one page at a time:
       - speech-level records
       - category_mode (mode of chunk categories; ties concatenated, stable order)
       - depth_max (max depth among chunks in speech)
       - origin_phase_avg
       - volume_chars (raw_text length)
+
+    Keyset pagination on (dt, speech_id): `after` is the key of the last row of the
+    previous page (None = first page). Returns (page, key of the next page or None).
+    `generation` is only part of the cache key (see fetch_generation).
     """
     # NOTE:
-    # - chunk_metrics joins chunks by chunk_id -> chunks.id
-    # - chunks joins speeches by speech_id -> speeches.id
-    # - category_mode is computed as "mode" by chunk counts, and ties are joined.
-    # - To keep a stable display order and avoid SQLite DISTINCT+separator limitation,
-    #   we aggregate ties via a correlated subquery ordering categories alphabetically.
-    sql = """
-    WITH cat_counts AS (
-      SELECT
-        c.speech_id,
-        m.category,
-        COUNT(*) AS n
-      FROM chunks c
-      JOIN chunk_metrics m ON m.chunk_id = c.id
-      GROUP BY c.speech_id, m.category
-    ),
-    cat_mode AS (
-      SELECT
-        cc.speech_id,
-        cc.category
-      FROM cat_counts cc
-      JOIN (
-        SELECT speech_id, MAX(n) AS max_n
-        FROM cat_counts
-        GROUP BY speech_id
-      ) mx
-      ON mx.speech_id = cc.speech_id AND mx.max_n = cc.n
-    )
-    SELECT
-      s.id AS speech_id,
-      s.pm_term_id,
-      s.pm_name,
-      s.dt,
-      COALESCE(s.title, '') AS title,
-      COALESCE(s.context, '') AS context,
-      COALESCE(s.source_url, '') AS source_url,
-      LENGTH(COALESCE(s.raw_text,'')) AS volume_chars,
-      MAX(m.depth_level) AS depth_max,
-      AVG(m.origin_phase) AS origin_phase_avg,
-      COALESCE((
-        SELECT GROUP_CONCAT(category, ' / ')
-        FROM (
-          SELECT DISTINCT category
-          FROM cat_mode
-          WHERE speech_id = s.id
-          ORDER BY category
-        )
-      ), '') AS category_mode
-    FROM speeches s
-    JOIN chunks c ON c.speech_id = s.id
-    JOIN chunk_metrics m ON m.chunk_id = c.id
-    WHERE 1=1
-      AND (:pm_name IS NULL OR s.pm_name = :pm_name)
-      AND (:from_dt IS NULL OR s.dt >= :from_dt)
-      AND (:to_dt IS NULL OR s.dt <= :to_dt)
-    GROUP BY
-      s.id, s.pm_term_id, s.pm_name, s.dt, s.title, s.context, s.source_url
-    ORDER BY s.dt DESC;
-    """
-
-    params: Dict[str, Any] = {
-        "pm_name": pm_name,
-        "from_dt": from_dt,
-        "to_dt": to_dt,
-    }
+    # - The per-speech aggregates are precomputed in speech_summary by 40_build_metrics
+    #   (only for the speeches it touched), so this is an indexed range scan on dt.
+    # - idx_speech_summary_dt / idx_speech_summary_pm_name_dt end in speech_id (rowid),
+    #   so (dt, speech_id) order and the row-value seek both come from the index and each
+    #   page costs the same however many speeches are stored.
+    # - Only the filters actually set go into WHERE, so SQLite can pick those indexes.
+    where = []
+    params: Dict[str, Any] = {"limit": page_size + 1}
+    if pm_name is not None:
+        where.append("ss.pm_name = :pm_name")
+        params["pm_name"] = pm_name
+    if from_dt is not None:
+        where.append("ss.dt >= :from_dt")
+        params["from_dt"] = from_dt
+    if to_dt is not None:
+        where.append("ss.dt <= :to_dt")
+        params["to_dt"] = to_dt
+    if after is not None:
+        where.append(f"(ss.dt, ss.speech_id) {'>' if ascending else '<'} (:after_dt, :after_id)")
+        params["after_dt"], params["after_id"] = after
 
     with connect(db_path) as conn:
+        if q:
+            # full-text search (speech_fts; see scripts/_fts.py), space-separated terms are ANDed
+            fts_where, fts_params = speech_filter(conn, q, id_column="ss.speech_id")
+            where.append(fts_where)
+            params.update(fts_params)
+
+        direction = "ASC" if ascending else "DESC"
+        sql = f"""
+        SELECT
+          ss.speech_id,
+          ss.pm_term_id,
+          ss.pm_name,
+          ss.dt,
+          COALESCE(s.title, '') AS title,
+          COALESCE(s.context, '') AS context,
+          COALESCE(s.source_url, '') AS source_url,
+          ss.volume_chars,
+          ss.depth_max,
+          ss.origin_phase_avg,
+          ss.category_mode
+        FROM speech_summary ss
+        JOIN speeches s ON s.id = ss.speech_id
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY ss.dt {direction}, ss.speech_id {direction}
+        LIMIT :limit;
+        """
         rows = conn.execute(sql, params).fetchall()
 
+    # one extra row tells whether there is a next page
+    next_key = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_key = (rows[-1]["dt"], rows[-1]["speech_id"])
+
     df = pd.DataFrame([dict(r) for r in rows])
     if df.empty:
-        return df
+        return df, None
 
     # UI-friendly formatting
     df["origin_phase_avg"] = df["origin_phase_avg"].astype(float).round(3)
     df["volume_chars"] = df["volume_chars"].astype(int)
     df["depth_max"] = df["depth_max"].astype(int)
 
-    # Helper column for date widgets & sorting/display
-    # dt can be "YYYY-MM-DD HH:MM" etc. We parse leniently.
-    df["dt_parsed"] = pd.to_datetime(df["dt"], errors="coerce")
-    df["date_only"] = df["dt"].astype(str).str.slice(0, 10)  # "YYYY-MM-DD" part
-
-    return df
+    return df, next_key
 
 
-@st.cache_data(show_spinner=False)
-def fetch_speech_detail(db_path: str, speech_id: int) -> Dict[str, Any]:
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def fetch_speech_detail(db_path: str, generation: int, speech_id: int) -> Dict[str, Any]:
     with connect(db_path) as conn:
         row = conn.execute(
             """
@@ -187,14 +207,53 @@ def fetch_speech_detail(db_path: str, speech_id: int) -> Dict[str, Any]:
               id AS speech_id, pm_term_id, pm_name, dt,
               COALESCE(title,'') AS title,
               COALESCE(context,'') AS context,
-              COALESCE(source_url,'') AS source_url,
-              COALESCE(raw_text,'') AS raw_text
+              COALESCE(source_url,'') AS source_url
             FROM speeches
             WHERE id = ?
             """,
             (speech_id,),
         ).fetchone()
-    return dict(row) if row else {}
+        if not row:
+            return {}
+        # the body is read (and decompressed) only here, for the one speech shown
+        return dict(row, raw_text=read_body(conn, speech_id) or "")
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def fetch_speech_chunks(db_path: str, generation: int, speech_id: int) -> pd.DataFrame:
+    """Chunks of one speech with their [char_start, char_end) offsets into raw_text."""
+    with connect(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT
+              c.order_in_speech, c.char_start, c.char_end,
+              COALESCE(m.category, '') AS category,
+              m.depth_level
+            FROM chunks c
+            LEFT JOIN chunk_metrics m ON m.chunk_id = c.id
+            WHERE c.speech_id = ? AND c.char_end IS NOT NULL
+            ORDER BY c.order_in_speech
+            """,
+            (speech_id,),
+        ).fetchall()
+    return pd.DataFrame([dict(r) for r in rows])
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def fetch_search_chunk_orders(db_path: str, generation: int, q: str, speech_id: int) -> list[int]:
+    """order_in_speech of the chunks of one speech that contain a search hit."""
+    with connect(db_path) as conn:
+        return [c["order_in_speech"] for c in search_chunks(conn, q, speech_ids=[speech_id])]
+
+
+def highlight_html(text: str, start: int, end: int) -> str:
+    """raw_text with [start, end) wrapped in <mark> (offsets come from 30_build_chunks)."""
+    import html as _html
+    return (
+        _html.escape(text[:start])
+        + "<mark>" + _html.escape(text[start:end]) + "</mark>"
+        + _html.escape(text[end:])
+    ).replace("\n", "<br>")
 
 
 # -------------------------
@@ -225,7 +284,8 @@ with st.expander("指標の定義（ポリシー固定）", expanded=False):
     )
 
 # DB status
-min_dt, max_dt, n_speeches = fetch_dt_range(db_path)
+generation = fetch_generation(db_path)
+min_dt, max_dt, n_speeches = fetch_dt_range(db_path, generation)
 
 col_a, col_b, col_c = st.columns(3)
 with col_a:
@@ -238,7 +298,7 @@ with col_c:
 st.divider()
 
 # Filters
-pm_names = fetch_pm_names(db_path)
+pm_names = fetch_pm_names(db_path, generation)
 fcol1, fcol2, fcol3 = st.columns([2, 2, 3])
 
 with fcol1:
@@ -283,47 +343,68 @@ with fcol3:
 from_dt = _to_from_dt(d_from) if d_from else None
 to_dt = _to_to_dt(d_to) if d_to else None
 
-# Load list
-df = fetch_line_list(db_path, pm_name=pm_name, from_dt=from_dt, to_dt=to_dt)
-
 st.subheader("線：発言一覧（時系列）")
 
-if df.empty:
-    st.warning("該当するデータがありません。フィルタ条件を調整してください。")
-    st.stop()
-
-# 表示順（公式トグル）
-order = st.radio(
-    "表示順",
-    options=["新しい順（DESC）", "古い順（ASC）"],
-    horizontal=True,
-    index=0,  # デフォルトは新しい順
-)
-
-# Search (title + context)
-q = st.text_input("検索（title / context の部分一致）", value="").strip()
-df_view = df.copy()
+ocol1, ocol2 = st.columns([3, 1])
+with ocol1:
+    # 表示順（公式トグル）
+    order = st.radio(
+        "表示順",
+        options=["新しい順（DESC）", "古い順（ASC）"],
+        horizontal=True,
+        index=0,  # デフォルトは新しい順
+    )
+with ocol2:
+    page_size = st.selectbox("1ページの件数", options=LINE_PAGE_SIZES, index=1)
 
-if q:
-    hay_title = df_view["title"].fillna("")
-    hay_ctx = df_view["context"].fillna("")
-    mask = hay_title.str.contains(q, case=False, na=False) | hay_ctx.str.contains(q, case=False, na=False)
-    df_view = df_view[mask]
+# Search (title + context + body; full-text index, space-separated terms are ANDed)
+q = st.text_input("検索（title / context / 本文の部分一致、空白区切りで AND）", value="").strip()
 
-# 安定ソート：dt_parsed → speech_id
+# 並び：dt → speech_id（同時刻でも順序が決まる）
 ascending = (order == "古い順（ASC）")
-df_view = df_view.sort_values(
-    by=["dt_parsed", "speech_id"],
-    ascending=[ascending, ascending],
-    kind="mergesort",  # 安定ソート
-)
 
-st.caption(f"表示件数：{len(df_view)} / 全件：{len(df)}")
+# Page cursors: keys of the last row of each previous page.
+# Any change of filter / order / search / page size starts again from page 1.
+list_key = (pm_name, from_dt, to_dt, q, ascending, page_size)
+if st.session_state.get("line_list_key") != list_key:
+    st.session_state["line_list_key"] = list_key
+    st.session_state["line_cursors"] = []
+cursors: list = st.session_state["line_cursors"]
+
+df_view, next_key = fetch_line_page(
+    db_path,
+    generation,
+    pm_name=pm_name,
+    from_dt=from_dt,
+    to_dt=to_dt,
+    q=q,
+    ascending=ascending,
+    after=cursors[-1] if cursors else None,
+    page_size=page_size,
+)
 
 if df_view.empty:
-    st.warning("検索条件に一致するデータがありません。検索語を調整してください。")
+    if q:
+        st.warning("検索条件に一致するデータがありません。検索語を調整してください。")
+    else:
+        st.warning("該当するデータがありません。フィルタ条件を調整してください。")
     st.stop()
 
+pcol1, pcol2, pcol3 = st.columns([1, 1, 4])
+with pcol1:
+    if st.button("← 前へ", disabled=not cursors):
+        cursors.pop()
+        st.rerun()
+with pcol2:
+    if st.button("次へ →", disabled=next_key is None):
+        cursors.append(next_key)
+        st.rerun()
+with pcol3:
+    st.caption(
+        f"ページ {len(cursors) + 1}：{df_view['dt'].iloc[0]} 〜 {df_view['dt'].iloc[-1]}"
+        f"（{len(df_view)} 件）"
+    )
+
 display_cols = [
     "speech_id",
     "dt",
@@ -344,24 +425,20 @@ st.dataframe(
 # Selection to show point (original)
 st.subheader("点：原本（全文）")
 
-# Better selector: show dt | pm_name | title
-options = []
-id_map: Dict[str, int] = {}
+# Better selector: show dt | pm_name | title (labels built column-wise, options are speech_ids)
+labels = dict(zip(
+    df_view["speech_id"].astype(int),
+    df_view["dt"].astype(str) + "｜" + df_view["pm_name"].astype(str) + "｜" + df_view["title"],
+))
 
-for _, r in df_view.iterrows():
-    sid = int(r["speech_id"])
-    label = f'{r["dt"]}｜{r["pm_name"]}｜{r["title"]}'
-    options.append(label)
-    id_map[label] = sid
-
-selected_label = st.selectbox(
+selected_id = st.selectbox(
     "表示する発言を選択してください（dt｜pm｜title）",
-    options=options,
+    options=list(labels),
     index=0,
+    format_func=labels.__getitem__,
 )
 
-selected_id = id_map[selected_label]
-detail = fetch_speech_detail(db_path, selected_id)
+detail = fetch_speech_detail(db_path, generation, selected_id)
 
 if not detail:
     st.error("speech_id に対応する発言が見つかりませんでした。")
@@ -385,4 +462,24 @@ st.text_area(
     "原文（raw_text）",
     value=detail.get("raw_text", ""),
     height=420,
-)
\ No newline at end of file
+)
+
+# Chunk highlight (offsets into raw_text; no re-searching of chunk text)
+chunks_df = fetch_speech_chunks(db_path, generation, selected_id)
+if not chunks_df.empty:
+    chunks_df = chunks_df.set_index("order_in_speech")
+    chunk_options = chunks_df.index.tolist()
+    # 検索中は、最初にヒットしたチャンクを選んでおく
+    hit_orders = fetch_search_chunk_orders(db_path, generation, q, selected_id) if q else []
+    chunk_order = st.selectbox(
+        "チャンクを原文上で表示（order｜category｜depth）",
+        options=chunk_options,
+        index=chunk_options.index(hit_orders[0]) if hit_orders and hit_orders[0] in chunk_options else 0,
+        format_func=lambda o: f'{o}｜{chunks_df.at[o, "category"]}｜{chunks_df.at[o, "depth_level"]}',
+    )
+    ch = chunks_df.loc[chunk_order]
+    with st.container(height=420):
+        st.markdown(
+            highlight_html(detail.get("raw_text", ""), int(ch["char_start"]), int(ch["char_end"])),
+            unsafe_allow_html=True,
+        )
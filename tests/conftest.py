@@ -0,0 +1,55 @@
+# tests/conftest.py
+#
+# 一時ファイルの DB に 10_init_db のスキーマを作り、speech を足してパイプライン（30 → 40）を回すための共通部品
+import importlib
+
+import pytest
+
+from scripts._db import connect
+
+init_db = importlib.import_module("scripts.10_init_db")
+chunks = importlib.import_module("scripts.30_build_chunks")
+metrics = importlib.import_module("scripts.40_build_metrics")
+
+PM_TERMS = [
+    ("kishida", "岸田 文雄", "2021-10-04", "2024-10-01"),
+    ("ishiba", "石破 茂", "2024-10-01", "2025-10-21"),
+]
+
+INSERT_SPEECH_SQL = """
+INSERT INTO speeches (pm_term_id, pm_name, dt, title, context, raw_text, source_url)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+@pytest.fixture
+def db(tmp_path):
+    """スキーマと pm_terms だけが入った空の DB（_db.connect で開いた接続）"""
+    conn = connect(str(tmp_path / "pm_speeches.db"))
+    init_db.init_db(conn)
+    conn.executemany(
+        "INSERT INTO pm_terms (pm_term_id, pm_name, term_start_date, term_end_date) VALUES (?, ?, ?, ?)",
+        PM_TERMS,
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def add_speech(conn, raw_text, dt="2024-06-03 10:00", pm_term_id="kishida", title="記者会見", context=None):
+    """speech を 1 本足して id を返す（本文は speeches.raw_text に直接入れる。移し替えは init_db.migrate）"""
+    pm_name = dict((t[0], t[1]) for t in PM_TERMS)[pm_term_id]
+    cur = conn.execute(
+        INSERT_SPEECH_SQL,
+        (pm_term_id, pm_name, dt, title, context, raw_text, f"https://example.jp/{conn.total_changes}"),
+    )
+    return cur.lastrowid
+
+
+def run_pipeline(conn, max_len=600):
+    """run_pipeline と同じ順で 30（分類をその場で流す）→ 40 を回してコミットする"""
+    writer = metrics.MetricsWriter(conn, metrics.TermTable.load(conn))
+    chunks.build_chunks(conn, max_len=max_len, on_batch=writer)
+    stats = metrics.build_metrics(conn, terms=writer.terms, touched=writer.speech_ids)
+    conn.commit()
+    return stats
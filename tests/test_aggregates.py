@@ -0,0 +1,101 @@
+# tests/test_aggregates.py
+#
+# 40_build_metrics の集約（speech_summary / metrics_cube）: 差分で作り直した結果が、
+# chunk_metrics を Python で数え直したものと一致すること
+from collections import Counter
+
+from conftest import add_speech, metrics, run_pipeline
+
+BODIES = [
+    "物価高への対応について申し上げます。\n\n賃上げを実現します。\n\n経済対策を取りまとめます。",
+    "防衛力の強化を進めてまいります。\n\n外交を展開します。",
+    "子育て支援を拡充します。\n\n少子化対策に取り組みます。\n\n教育の無償化を進めます。\n\n地方創生を進めます。",
+]
+
+
+def _expected_summaries(conn):
+    rows = conn.execute(
+        """
+        SELECT c.speech_id, s.pm_term_id, s.pm_name, s.dt,
+               COALESCE(s.char_count, LENGTH(s.raw_text), 0) AS volume_chars,
+               m.category, m.depth_level, m.origin_phase
+        FROM chunks c JOIN chunk_metrics m ON m.chunk_id = c.id JOIN speeches s ON s.id = c.speech_id
+        """
+    ).fetchall()
+    by_speech: dict = {}
+    for r in rows:
+        by_speech.setdefault(r["speech_id"], []).append(r)
+    out = {}
+    for sid, rs in by_speech.items():
+        cats = Counter(r["category"] for r in rs)
+        top = max(cats.values())
+        out[sid] = (
+            sid, rs[0]["pm_term_id"], rs[0]["pm_name"], rs[0]["dt"], rs[0]["volume_chars"], len(rs),
+            max(r["depth_level"] for r in rs),
+            sum(r["origin_phase"] for r in rs) / len(rs),
+            " / ".join(sorted(c for c, n in cats.items() if n == top)),
+        )
+    return out
+
+
+def _expected_cube(conn):
+    counts = Counter(
+        (r["pm_term_id"], r["date"][:7], r["category"], r["depth_level"])
+        for r in conn.execute("SELECT pm_term_id, date, category, depth_level FROM chunk_metrics")
+    )
+    return sorted(k + (n,) for k, n in counts.items())
+
+
+def _check(conn):
+    summaries = {r[0]: tuple(r) for r in conn.execute("SELECT * FROM speech_summary")}
+    assert summaries == _expected_summaries(conn)
+    assert sorted(tuple(r) for r in conn.execute("SELECT * FROM metrics_cube")) == _expected_cube(conn)
+
+
+def test_aggregates_follow_inserts_edits_and_deletes(db):
+    ids = [add_speech(db, body, dt=f"2024-0{i + 1}-15 10:00") for i, body in enumerate(BODIES)]
+    run_pipeline(db)
+    _check(db)
+    assert db.execute("SELECT volume_chars FROM speech_summary WHERE speech_id = ?", (ids[0],)).fetchone()[0] == len(BODIES[0])
+
+    # 追加: 既存のセルに足される
+    add_speech(db, "賃上げを実現します。", dt="2024-01-20 10:00")
+    run_pipeline(db)
+    _check(db)
+
+    # 本文の書き換え: チャンクが減り、件数も減る
+    db.execute("UPDATE speeches SET raw_text = ?, char_count = NULL WHERE id = ?", ("外交を展開します。", ids[2]))
+    db.commit()
+    run_pipeline(db)
+    _check(db)
+    assert db.execute("SELECT n_chunks FROM speech_summary WHERE speech_id = ?", (ids[2],)).fetchone()[0] == 1
+
+    # 削除: 集約が消え、そのセルは空になる
+    db.execute("DELETE FROM speeches WHERE id = ?", (ids[1],))
+    db.commit()
+    run_pipeline(db)
+    _check(db)
+    assert db.execute("SELECT 1 FROM speech_summary WHERE speech_id = ?", (ids[1],)).fetchone() is None
+    assert db.execute("SELECT 1 FROM metrics_cube WHERE month = '2024-02'").fetchone() is None
+
+
+def test_category_mode_lists_ties_by_name(db):
+    sid = add_speech(db, BODIES[2])
+    run_pipeline(db)
+    chunk_ids = [r[0] for r in db.execute("SELECT id FROM chunks WHERE speech_id = ? ORDER BY id", (sid,))]
+    for cid, cat in zip(chunk_ids, ["経済", "外交", "外交", "経済"]):
+        db.execute("UPDATE chunk_metrics SET category = ? WHERE chunk_id = ?", (cat, cid))
+    metrics.refresh_aggregates(db, [sid])
+    assert db.execute("SELECT category_mode FROM speech_summary WHERE speech_id = ?", (sid,)).fetchone()[0] == "外交 / 経済"
+    _check(db)
+
+
+def test_first_refresh_fills_the_whole_cube(db):
+    for i, body in enumerate(BODIES):
+        add_speech(db, body, dt=f"2024-0{i + 1}-15 10:00")
+    run_pipeline(db)
+    db.execute("DELETE FROM metrics_cube")
+    # キューブが空なら、渡した speech に関係なく全 (任期, 月) を数え直す
+    stats = metrics.refresh_aggregates(db, [])
+    assert stats["cube"] == 3
+    _check(db)
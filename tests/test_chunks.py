@@ -0,0 +1,164 @@
+# tests/test_chunks.py
+#
+# 30_build_chunks の分割とノイズ除去。
+# NoiseFilter と fixed の分割は、置き換える前の is_noise_line / split_text（ここに凍結）と同じ結果になること、
+# sentence の分割は位置・長さ・切れ目の性質を満たすこと
+import random
+import re
+
+import pytest
+
+from conftest import chunks
+
+
+def old_is_noise_line(s: str) -> bool:
+    t = (s or "").strip()
+    if not t:
+        return True
+    if ("開く" in t and "閉じる" in t and "第" in t and "代" in t):
+        return True
+    if t in {"関連リンク", "開く", "閉じる"}:
+        return True
+    if re.match(r"^第\d+代$", t):
+        return True
+    if re.match(r"^令和\d+年$", t):
+        return True
+    if re.match(r"^[一-龥]{2,}\s+[一-龥]{2,}$", t) and len(t) <= 10:
+        return True
+    noise_phrases = [
+        "当サイトではJavaScriptを使用しております",
+        "ブラウザの設定でJavaScriptを有効",
+        "総理の演説・記者会見など",
+        "首相官邸ホームページ",
+        "動画が再生できない方は",
+        "政府広報オンライン",
+        "ツイート",
+        "更新日：",
+    ]
+    if any(p in t for p in noise_phrases):
+        return True
+    if len(t) <= 3:
+        return True
+    return False
+
+
+def old_split_text(raw: str, max_len: int) -> list[str]:
+    paras = [p.strip() for p in (raw or "").split("\n\n") if p.strip()]
+    out: list[str] = []
+    for p in paras:
+        if len(p) <= max_len:
+            out.append(p)
+        else:
+            for i in range(0, len(p), max_len):
+                part = p[i:i + max_len].strip()
+                if part:
+                    out.append(part)
+    return [x for x in out if not old_is_noise_line(x)]
+
+
+PIECES = [
+    "関連リンク", "開く", "閉じる", "第103代", "第7代", "令和7年", "令和", "石破 茂", "岸田 文雄",
+    "高市 早苗", "石破茂 石破茂石破茂", "ツイート", "更新日：令和7年1月1日", "首相官邸ホームページ",
+    "本日は経済について申し上げます。", "物価高への対応を進めます", "。", "、", "あ", "GDP",
+    "\n", "\n\n", "\n\n\n", " ", "　", "\t", " ",
+]
+
+
+def random_raw(rng: random.Random) -> str:
+    return "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 60)))
+
+
+def test_noise_filter_parity():
+    rng = random.Random(15)
+    nf = chunks.NoiseFilter()
+    lines = PIECES + ["第103代\n石破 茂\n開く\n閉じる", "令和7年度", "第１０３代"]
+    lines += [random_raw(rng)[:rng.randint(0, 20)] for _ in range(5000)]
+    for line in lines:
+        assert nf(line) == old_is_noise_line(line), repr(line)
+
+
+@pytest.mark.parametrize(
+    "line, rule",
+    [
+        ("   ", "empty"),
+        ("第103代\n石破 茂\n開く\n閉じる", "nav_block"),
+        ("関連リンク", "exact_line"),
+        ("第103代", "term_number"),
+        ("令和7年", "era_year"),
+        ("岸田 文雄", "person_name"),
+        ("首相官邸ホームページへ", "phrase"),
+        ("本日", "short"),
+        ("本日は晴れです", None),
+    ],
+)
+def test_noise_filter_rules(line, rule):
+    nf = chunks.NoiseFilter()
+    assert nf.match(line) == rule
+    assert nf(line) is (rule is not None)
+    assert sum(nf.hits.values()) == (rule is not None)
+
+
+def test_noise_filter_counts_hits():
+    nf = chunks.NoiseFilter()
+    for line in ["関連リンク", "開く", "令和7年", "本文です。本文です。"]:
+        nf(line)
+    assert nf.hits == {"exact_line": 2, "era_year": 1}
+    assert nf.report() == "exact_line=2, era_year=1"
+
+
+@pytest.mark.parametrize("max_len", [5, 20, 600])
+def test_fixed_split_matches_old_split_text(max_len):
+    rng = random.Random(max_len)
+    for _ in range(2000):
+        raw = random_raw(rng)
+        assert chunks.split_text(raw, max_len) == old_split_text(raw, max_len), repr(raw)
+
+
+def test_sentence_split_cuts_after_breaks():
+    raw = "１ 始めに。本日は経済について申し上げます。物価高への対応を進めます。\n次の段落です。\n\n関連リンク\n\n" + "あ" * 25
+    spans = list(chunks.iter_spans(raw, 20, "sentence"))
+    assert [raw[s:e] for s, e in spans] == [
+        "１ 始めに。",
+        "本日は経済について申し上げます。",
+        "物価高への対応を進めます。",
+        "次の段落です。",
+        "ああああああああああああああああああああ",  # 区切りが無ければ max_len で切る
+        "あああああ",
+    ]
+
+
+@pytest.mark.parametrize("splitter", chunks.SPLITTERS)
+def test_spans_are_stripped_ordered_and_bounded(splitter):
+    rng = random.Random(16)
+    for _ in range(2000):
+        raw = random_raw(rng)
+        max_len = rng.choice([4, 10, 30])
+        spans = list(chunks.iter_spans(raw, max_len, splitter))
+        prev_end = 0
+        for s, e in spans:
+            text = raw[s:e]
+            assert prev_end <= s < e
+            assert len(text) <= max_len
+            assert text == text.strip()
+            assert not old_is_noise_line(text)
+            prev_end = e
+
+
+def test_sentence_cuts_end_at_breaks():
+    rng = random.Random(17)
+    for _ in range(2000):
+        raw = random_raw(rng)
+        max_len = rng.choice([4, 10, 30])
+        cuts = list(chunks._sentence_cuts(raw, 0, len(raw), max_len))
+        # 隙間なく並び、どれも max_len 以下
+        assert [s for s, _ in cuts] == [0] + [e for _, e in cuts[:-1]]
+        assert cuts[-1][1] == len(raw)
+        for s, e in cuts[:-1]:
+            assert e - s <= max_len
+            window = raw[s + 1:s + max_len]
+            if any(b in window for b in chunks.SENTENCE_BREAKS):
+                # 窓の中の最後の区切りの直後で切る
+                assert raw[e - 1] in chunks.SENTENCE_BREAKS
+                assert not any(b in raw[e:s + max_len] for b in chunks.SENTENCE_BREAKS)
+            else:
+                assert e - s == max_len
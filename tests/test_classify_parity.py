@@ -0,0 +1,132 @@
+# tests/test_classify_parity.py
+#
+# 40_build_metrics.classify_chunk（キーワードを一度に引く版）が、
+# 置き換える前の any(k in t …) の連鎖と同じ (category, depth) を返すことを確かめる。
+# 旧実装はここに凍結しておく（規則を変えるときは RULES_VERSION と一緒にこちらも見直す）。
+import importlib
+import random
+import re
+from typing import Tuple
+
+import pytest
+
+metrics = importlib.import_module("scripts.40_build_metrics")
+
+QNA_MARKERS = ["【質疑応答】", "（記者）", "（司会）"]
+PRESS = ["通信", "新聞", "テレビ", "放送", "共同", "時事", "NHK", "ロイター", "Reuters"]
+ACK = ["どうぞ", "大丈夫です", "お願いいたします", "ありがとうございます"]
+RULES = [
+    ("経済・財政", ["景気", "物価", "GDP", "成長", "税", "財政", "賃上げ", "投資", "金融"]),
+    ("治安・犯罪対策", [
+        "治安", "犯罪", "テロ", "詐欺", "闇バイト", "ストーカー", "DV", "配偶者からの暴力",
+        "性犯罪", "児童虐待", "被害者", "加害者", "暴力", "取り締まり", "検挙",
+        "法規制", "規制強化",
+    ]),
+    ("国内政治・制度", [
+        "国会", "委員会", "法案", "改正", "制度", "政党", "選挙", "公職選挙法",
+        "政治改革", "行政改革", "統治機構", "憲法", "内閣", "閣議", "与党", "野党",
+    ]),
+    ("災害・危機対応", ["地震", "災害", "台風", "被災", "復旧", "危機", "感染症"]),
+    ("福祉・社会保障", ["年金", "介護", "医療", "社会保障", "生活保護", "福祉"]),
+    ("教育・子育て", ["教育", "学校", "子育て", "保育", "少子化", "奨学金"]),
+    ("科学技術・デジタル", ["デジタル", "AI", "DX", "科学技術", "研究開発", "半導体"]),
+    ("外交・安全保障", ["防衛", "安全保障", "自衛隊", "安保", "抑止", "ミサイル", "侵略"]),
+    ("外交・首脳外交", [
+        "首脳", "首脳会談", "会談", "会合", "国際会議", "サミット",
+        "訪問", "外遊", "共同声明", "首相", "大統領", "国家主席", "外相",
+        "ＡＰＥＣ", "APEC", "Ｇ７", "G7", "Ｇ２０", "G20", "国連", "UN",
+        "ＡＳＥＡＮ", "ASEAN", "ＥＵ", "EU",
+    ]),
+]
+
+
+def old_classify_chunk(text: str) -> Tuple[str, int]:
+    t = (text or "").strip()
+
+    if any(k in t for k in QNA_MARKERS) or t.startswith("（記者"):
+        category = "Q&A・記者質問"
+    elif re.fullmatch(r"（[^）]{1,12}）", t):
+        category = "構造・見出し"
+    elif ("と申します" in t) and any(k in t for k in PRESS):
+        category = "Q&A・記者質問"
+    elif len(t) <= 30 and any(k in t for k in ACK):
+        category = "構造・見出し"
+    else:
+        category = next((cat for cat, words in RULES if any(k in t for k in words)), "その他")
+
+    length = len(t)
+    if length < 80:
+        depth = 0
+    elif length < 250:
+        depth = 1
+    elif length < 600:
+        depth = 2
+    else:
+        depth = 3
+
+    return category, depth
+
+
+# キーワードの断片や境界をまたぐ並びも混ざるように、語彙・その部分文字列・雑音から組み立てる
+VOCAB = (
+    QNA_MARKERS + PRESS + ACK + ["と申します", "（記者", "（", "）", "（高市総理）", "【", "】"]
+    + [k for _, words in RULES for k in words]
+)
+NOISE = ["、", "。", " ", "\n", "の", "を", "です", "私", "日本", "A", "I", "D", "X", "U", "N", "Ｇ", "７"]
+
+
+def random_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.choice([0, 1, 1, 2, 3, 5, 8, 40, 120])):
+        r = rng.random()
+        if r < 0.4:
+            parts.append(rng.choice(VOCAB))
+        elif r < 0.55:
+            k = rng.choice(VOCAB)
+            i = rng.randrange(len(k))
+            parts.append(k[i:rng.randint(i + 1, len(k))])
+        else:
+            parts.append(rng.choice(NOISE) * rng.randint(1, 3))
+    text = "".join(parts)
+    if rng.random() < 0.1:
+        text = rng.choice([" ", "\n", "　"]) + text + rng.choice(["", " ", "\n"])
+    return text
+
+
+GOLDEN = [
+    None,
+    "",
+    "（記者）総理、よろしくお願いします。",
+    "（記者の質問）",
+    "【質疑応答】",
+    "（高市総理）",
+    "（あいうえおかきくけこさしすせ）",
+    "共同通信の山田と申します。",
+    "と申します。税について伺います。",
+    "どうぞ。",
+    "ありがとうございます。" * 3,
+    "ありがとうございます。" * 4,
+    "物価と防衛と教育について",
+    "AIとEUとUNの会談",
+    "ＡＰＥＣ首脳会議に出席しました。",
+    "DVと税",
+    "特に申し上げることはありません。",
+    "あ" * 79,
+    "あ" * 80,
+    "あ" * 249,
+    "あ" * 250,
+    "あ" * 599,
+    "あ" * 600,
+]
+
+
+@pytest.mark.parametrize("text", GOLDEN)
+def test_golden(text):
+    assert metrics.classify_chunk(text) == old_classify_chunk(text)
+
+
+def test_random_parity():
+    rng = random.Random(20251017)
+    for _ in range(20000):
+        text = random_text(rng)
+        assert metrics.classify_chunk(text) == old_classify_chunk(text), repr(text)
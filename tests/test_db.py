@@ -0,0 +1,73 @@
+# tests/test_db.py
+#
+# scripts/_db.py の keyset ページング（iter_pages / iter_rows）と読み出し専用の ReadPool
+import sqlite3
+
+import pytest
+
+from scripts._db import ReadPool, iter_pages, iter_rows
+
+PAGE_SQL = "SELECT id, v FROM t WHERE id > :after AND v % :mod = 0 ORDER BY id LIMIT :limit"
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / "paging.db"
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v INTEGER NOT NULL, k TEXT NOT NULL)")
+    # id は飛び飛び・負の値も含める（開始位置は -2**63）
+    ids = [-5, -1, 0] + list(range(3, 300, 3)) + [10 ** 12]
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", [(i, i * 7, f"k{i:+014d}") for i in ids])
+    conn.commit()
+    yield conn, ids, path
+    conn.close()
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 7, 103, 104, 1000])
+def test_iter_rows_reads_every_row_once_in_order(table, page_size):
+    conn, ids, _ = table
+    rows = list(iter_rows(conn, PAGE_SQL, {"mod": 1}, page_size=page_size))
+    assert [r["id"] for r in rows] == ids
+
+
+def test_iter_pages_sizes_and_params(table):
+    conn, ids, _ = table
+    pages = list(iter_pages(conn, PAGE_SQL, {"mod": 2}, page_size=10))
+    expected = [i for i in ids if i * 7 % 2 == 0]
+    assert [r["id"] for page in pages for r in page] == expected
+    assert [len(p) for p in pages[:-1]] == [10] * (len(pages) - 1)
+    assert 0 < len(pages[-1]) <= 10
+    empty = "SELECT id FROM t WHERE id > :after AND id > :top ORDER BY id LIMIT :limit"
+    assert list(iter_pages(conn, empty, {"top": ids[-1]}, page_size=10)) == []
+
+
+def test_iter_rows_custom_key(table):
+    conn, ids, _ = table
+    sql = "SELECT k, id FROM t WHERE k > :after ORDER BY k LIMIT :limit"
+    # 文字列キーは最初のページだけ -2**63（数値）と比べるので、SQLite の型順で全行が通る
+    keys = [r["k"] for r in iter_rows(conn, sql, key="k", page_size=4)]
+    assert keys == sorted(f"k{i:+014d}" for i in ids)
+
+
+def test_read_pool_is_read_only_and_reuses_connections(table):
+    _, ids, path = table
+    pool = ReadPool(str(path), size=1)
+    try:
+        with pool.connection() as conn:
+            first = conn
+            assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == len(ids)
+            assert conn.execute("SELECT speech_body(NULL, NULL)").fetchone()[0] is None
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                conn.execute("DELETE FROM t")
+        # 同時に 2 本借りると 2 本目は新しく開く。size=1 なので、後から返した方は閉じる
+        with pool.connection() as conn:
+            assert conn is first
+            with pool.connection() as other:
+                assert other is not first
+        with pytest.raises(sqlite3.ProgrammingError):
+            first.execute("SELECT 1")
+        with pool.connection() as conn:
+            assert conn is other
+    finally:
+        pool.close()
@@ -0,0 +1,65 @@
+# tests/test_extract_parity.py
+#
+# kantei_scraper の本文抽出: lxml 版（既定の --extractor auto）が bs4 版と同じ (タイトル, 本文) を返すこと。
+# 違えば raw_text・チャンク位置・本文ハッシュがずれ、再投入で既存 speech が変わったように見える
+from pathlib import Path
+
+import pytest
+
+from scripts import kantei_scraper as ks
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures" / "kantei").glob("*.html"))
+
+needs_lxml = pytest.mark.skipif(ks.lxml_html is None, reason="lxml is not installed")
+
+
+def _read(path: Path) -> str:
+    # キャッシュから読むときと同じく、バイト列から文字コードを判定して復号する（\r\n はそのまま）
+    body = path.read_bytes()
+    return body.decode(ks.response_encoding("", body), errors="replace")
+
+
+@needs_lxml
+@pytest.mark.parametrize("path", FIXTURES, ids=[p.name for p in FIXTURES])
+def test_fixture_pages(path):
+    html = _read(path)
+    assert ks.extract_with_lxml(html) == ks.extract_with_bs4(html)
+
+
+@needs_lxml
+@pytest.mark.parametrize(
+    "html, body",
+    [
+        # ブロック間の空白だけのノードは、改行が何個あっても "\n" 1 つ
+        ("<p>１ x</p>\n\n\n<p>y</p>", "１ x\n\n\ny"),
+        ("<div id='contents'><p>１ x</p> \n\t\n <p>y</p></div>", "１ x\n\n\ny"),
+        # 改行を含まなければ " " 1 つ（その行は normalize_text が空行にする）
+        ("<p>１ x</p>\t \t<p>y</p>", "１ x\n\ny"),
+        ("<p>１ x</p>\r\r<p>y</p>", "１ x\n\ny"),
+        # pre / textarea の中は縮めない
+        ("<main><p>１ x</p><pre>\n\n\n</pre><p>y</p></main>", "１ x\n\n\n\n\ny"),
+        ("<main><p>１ x</p><textarea>\n \n</textarea><p>y</p></main>", "１ x\n\n\n\ny"),
+        # &nbsp; は ASCII の空白ではないので縮めない
+        ("<p>１ x</p>&nbsp;\n\n<p>y</p>", "１ x\n\n\n\ny"),
+    ],
+)
+def test_whitespace_between_blocks(html, body):
+    assert ks.extract_with_bs4(html)[1] == body
+    assert ks.extract_with_lxml(html)[1] == body
+
+
+@needs_lxml
+def test_title_keeps_carriage_returns():
+    html = "<body>\r\n<h1>記者会見\r\n（令和6年11月11日）</h1>\r\n<p>１ 本文</p>\r\n</body>"
+    assert ks.extract_with_bs4(html)[0] == "記者会見\r\n（令和6年11月11日）"
+    assert ks.extract_with_lxml(html) == ks.extract_with_bs4(html)
+
+
+def test_contents_fixture_body():
+    title, body = ks.extract_with_bs4(_read(FIXTURES[0]))
+    assert FIXTURES[0].name == "contents.html"
+    assert title == "第二百十七回国会における施政方針演説"
+    assert body.startswith("１ 始めに\n")
+    assert "施政\n方針" in body and "しせい" not in body     # ルビの読みは落とす
+    assert "当サイトではJavaScriptを使用しております。" in body  # noscript は従来どおり残す
+    assert "ホーム" not in body and "Copyright" not in body  # 本文コンテナの外
@@ -0,0 +1,136 @@
+# tests/test_fts.py
+#
+# scripts/_fts.py の全文検索: trigram（3 文字以上）・bigram（2 文字以下）・記号を含む短い語、
+# _db.connect 以外の接続（speech_body() の無い sqlite3）からの書き換えと、refresh_fts までの間の検索
+import random
+import sqlite3
+
+import pytest
+
+from conftest import add_speech, init_db, run_pipeline
+from scripts import _fts
+from scripts._db import encode_body, read_body
+
+SPEECHES = [
+    ("景気と物価について申し上げます。憲法改正を議論します。", "施政方針演説"),
+    ("防衛力を抜本的に強化します。税の在り方も見直します。", "記者会見"),
+    ("脱炭素とGXを進めます。100%再エネを目指し、ａ案を採ります。", "GX実行会議"),
+    ("子育て支援を拡充します。景気の回復を確かなものにします。", "所信表明演説"),
+]
+
+
+@pytest.fixture
+def indexed(db):
+    ids = [add_speech(db, body, title=title) for body, title in SPEECHES]
+    init_db.migrate(db)  # 本文を speech_bodies へ移し、refresh_fts で索引する
+    db.commit()
+    return db, ids
+
+
+def _path(conn) -> str:
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+
+def _brute(conn, terms):
+    hits = set()
+    for r in conn.execute("SELECT id, title, context FROM speeches"):
+        texts = [r["title"] or "", r["context"] or "", read_body(conn, r["id"]) or ""]
+        if all(any(t.lower() in x.lower() for x in texts) for t in terms):
+            hits.add(r["id"])
+    return hits
+
+
+def _search(conn, q):
+    return set(_fts.search_speech_ids(conn, q))
+
+
+def test_indexes_hold_no_plaintext(indexed):
+    db, _ = indexed
+    assert _fts.fts_available(db)
+    assert db.execute("SELECT COUNT(*) FROM speech_fts_pending").fetchone()[0] == 0
+    # contentless: 本文の写しを持つ _content 表が無く、列を読んでも値は返らない
+    names = {r[0] for r in db.execute("SELECT name FROM sqlite_master")}
+    assert "speech_fts_content" not in names and "speech_bigrams_content" not in names
+    row = db.execute("SELECT raw_text FROM speech_fts WHERE speech_fts MATCH '\"申し上げ\"'").fetchone()
+    assert row is not None and row[0] is None
+    assert db.execute("SELECT COUNT(*) FROM speeches WHERE raw_text IS NOT NULL").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize(
+    "q, expected",
+    [
+        ("申し上げます", [0]),        # trigram
+        ("景気", [0, 3]),             # bigram
+        ("税", [1]),                  # 1 文字
+        ("景気 憲法", [0]),           # AND
+        ("景気 防衛", []),
+        ("gx", [2]),                  # 大文字小文字は区別しない（タイトルにも当たる）
+        ("記者会見", [1]),            # タイトル
+        ("%", [2]),                   # 記号だけの語
+        ("0%", [2]),                  # 記号を含む短い語（英数字で候補を絞ってから確かめる）
+        ("ａ", [2]),
+    ],
+)
+def test_search_terms(indexed, q, expected):
+    db, ids = indexed
+    assert _search(db, q) == {ids[i] for i in expected}
+
+
+def test_plain_sqlite_writes_are_searchable_before_and_after_refresh(indexed):
+    db, ids = indexed
+    plain = sqlite3.connect(_path(db))  # speech_body() を登録していない接続
+    plain.execute("UPDATE speeches SET title = '臨時記者会見' WHERE id = ?", (ids[0],))
+    codec, body = encode_body("新しい本文です。税制を見直します。")
+    plain.execute("UPDATE speech_bodies SET codec = ?, body = ? WHERE speech_id = ?", (codec, body, ids[1]))
+    plain.execute("DELETE FROM speech_bodies WHERE speech_id = ?", (ids[2],))
+    plain.execute("DELETE FROM speeches WHERE id = ?", (ids[2],))
+    plain.execute(
+        "INSERT INTO speeches (pm_term_id, pm_name, dt, title, raw_text) VALUES (?, ?, ?, ?, ?)",
+        ("kishida", "岸田 文雄", "2024-07-01", "談話", "円安への対応を取りまとめます。"),
+    )
+    plain.commit()
+    plain.close()
+
+    db.rollback()
+    assert db.execute("SELECT COUNT(*) FROM speech_fts_pending").fetchone()[0] == 4
+    queries = ["臨時記者会見", "施政方針演説", "税制", "防衛", "GX", "100", "円安", "税", "景気"]
+    before = {q: _search(db, q) for q in queries}
+    for q in queries:
+        assert before[q] == _brute(db, q.split()), q
+    assert before["防衛"] == set() and before["GX"] == set()
+
+    assert _fts.refresh_fts(db) == 4
+    db.commit()
+    assert db.execute("SELECT COUNT(*) FROM speech_fts_pending").fetchone()[0] == 0
+    assert {q: _search(db, q) for q in queries} == before
+    db.execute("INSERT INTO speech_fts (speech_fts) VALUES ('integrity-check')")
+    db.execute("INSERT INTO speech_bigrams (speech_bigrams) VALUES ('integrity-check')")
+
+
+def test_random_terms_match_brute_force(indexed):
+    db, _ = indexed
+    corpus = "".join(body + title for body, title in SPEECHES)
+    rng = random.Random(17)
+    for _ in range(300):
+        terms = []
+        for _ in range(rng.choice([1, 1, 2])):
+            n = rng.choice([1, 2, 3, 4])
+            i = rng.randrange(len(corpus) - n)
+            terms.append(corpus[i:i + n])
+        q = " ".join(terms)
+        assert _search(db, q) == _brute(db, _fts.split_terms(q)), q
+
+
+def test_search_chunks_points_into_chunks(db):
+    ids = [add_speech(db, body + "\n\n" + body, title=title) for body, title in SPEECHES]
+    init_db.migrate(db)
+    run_pipeline(db, max_len=20)
+
+    hits = _fts.search_chunks(db, "景気")
+    assert {h["speech_id"] for h in hits} == {ids[0], ids[3]}
+    for h in hits:
+        raw = read_body(db, h["speech_id"])
+        assert h["hits"]
+        for start, end in h["hits"]:
+            assert raw[start:end] == "景気"
+            assert h["char_start"] <= start and end <= h["char_end"]
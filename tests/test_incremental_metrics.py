@@ -0,0 +1,89 @@
+# tests/test_incremental_metrics.py
+#
+# 40_build_metrics の差分更新: speech の dt / pm_term_id を書き換えたら、
+# chunk_metrics・speech_summary・metrics_cube が全件作り直しと同じ状態に追いつくこと
+from conftest import add_speech, metrics, run_pipeline
+
+BODY = "物価高への対応について申し上げます。\n\n防衛力の強化を進めてまいります。\n\n子育て支援を拡充します。"
+
+
+def _metric_rows(conn, speech_id):
+    return conn.execute(
+        """
+        SELECT m.pm_term_id, m.date, m.category, m.depth_level, m.origin_phase
+        FROM chunks c JOIN chunk_metrics m ON m.chunk_id = c.id
+        WHERE c.speech_id = ? ORDER BY c.order_in_speech
+        """,
+        (speech_id,),
+    ).fetchall()
+
+
+def _cube(conn):
+    return sorted(tuple(r) for r in conn.execute("SELECT * FROM metrics_cube"))
+
+
+def _summary(conn, speech_id):
+    return tuple(conn.execute("SELECT * FROM speech_summary WHERE speech_id = ?", (speech_id,)).fetchone())
+
+
+def _rebuilt(conn):
+    """同じ DB を --rebuild 相当で作り直したときの (chunk_metrics, cube)"""
+    metrics.build_metrics(conn, rebuild=True)
+    conn.execute("DELETE FROM metrics_cube")
+    metrics.refresh_aggregates(conn, [r[0] for r in conn.execute("SELECT id FROM speeches")])
+    return conn.execute("SELECT chunk_id, pm_term_id, date, origin_phase FROM chunk_metrics ORDER BY chunk_id").fetchall()
+
+
+def test_dt_edit_moves_metrics_and_cube(db):
+    sid = add_speech(db, BODY, dt="2024-06-03 10:00")
+    other = add_speech(db, "経済対策を取りまとめます。", dt="2024-02-10 09:00")
+    run_pipeline(db)
+    before = _metric_rows(db, sid)
+    assert {r["date"] for r in before} == {"2024-06-03"}
+
+    db.execute("UPDATE speeches SET dt = '2024-02-02 15:00' WHERE id = ?", (sid,))
+    db.commit()
+    stats = run_pipeline(db)
+
+    after = _metric_rows(db, sid)
+    assert stats["metrics"] == len(before)
+    assert {r["date"] for r in after} == {"2024-02-02"}
+    assert all(a["origin_phase"] < b["origin_phase"] for a, b in zip(after, before))
+    assert [r["category"] for r in after] == [r["category"] for r in before]
+
+    # 6 月のセルは空になり、2 月のセルに 2 本分が載る
+    months = {(r["pm_term_id"], r["month"]) for r in db.execute("SELECT * FROM metrics_cube")}
+    assert months == {("kishida", "2024-02")}
+    summary = _summary(db, sid)
+    assert summary[3] == "2024-02-02 15:00"
+    assert summary[7] == sum(r["origin_phase"] for r in after) / len(after)
+
+    cube = _cube(db)
+    incremental = db.execute("SELECT chunk_id, pm_term_id, date, origin_phase FROM chunk_metrics ORDER BY chunk_id").fetchall()
+    assert [tuple(r) for r in _rebuilt(db)] == [tuple(r) for r in incremental]
+    assert _cube(db) == cube
+    assert _metric_rows(db, other)
+
+
+def test_pm_term_edit_moves_metrics_and_cube(db):
+    sid = add_speech(db, BODY, dt="2024-10-01 18:00", pm_term_id="kishida")
+    run_pipeline(db)
+    assert {r["pm_term_id"] for r in _metric_rows(db, sid)} == {"kishida"}
+    assert {r["origin_phase"] for r in _metric_rows(db, sid)} == {1.0}
+
+    db.execute("UPDATE speeches SET pm_term_id = 'ishiba', pm_name = '石破 茂' WHERE id = ?", (sid,))
+    db.commit()
+    run_pipeline(db)
+
+    rows = _metric_rows(db, sid)
+    assert {r["pm_term_id"] for r in rows} == {"ishiba"}
+    assert {r["origin_phase"] for r in rows} == {0.0}
+    assert {r[0] for r in db.execute("SELECT pm_term_id FROM metrics_cube")} == {"ishiba"}
+    assert _summary(db, sid)[1:3] == ("ishiba", "石破 茂")
+    assert _summary(db, sid)[7] == 0.0
+
+
+def test_unchanged_speeches_are_not_reclassified(db):
+    add_speech(db, BODY)
+    run_pipeline(db)
+    assert run_pipeline(db)["metrics"] == 0